@@ -0,0 +1,61 @@
+import heapq
+import datetime
+
+from deadline_timer import DeadlineTimer
+
+
+class AlertScheduler:
+    """予定の通知時刻をmin-heapで管理し、先頭の期限にだけタイマーを掛ける。"""
+
+    def __init__(self, root, on_alert, lead_minutes=5, now=None):
+        self.root = root
+        self.on_alert = on_alert  # on_alert(event, minutes_left)
+        self.lead_minutes = lead_minutes
+        self.enabled = False
+        self._now = now or (lambda: datetime.datetime.now(datetime.timezone.utc))
+        self._events = []
+        self._heap = []     # (通知時刻, 連番, Event)
+        self._fired = set()  # 通知済みの (Event.key, 開始時刻)
+        self._timer = DeadlineTimer(root, self._now)
+
+    def set_events(self, events):
+        """通知対象の予定を入れ替え、次の期限にタイマーを掛け直す。"""
+        self._events = [e for e in events if not e.all_day]
+        self._rebuild()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled:
+            self._fired.clear()
+        self._rebuild()
+
+    def _rebuild(self):
+        now = self._now()
+        lead = datetime.timedelta(minutes=self.lead_minutes)
+        current = {(e.key, e.start) for e in self._events}
+        # 予定一覧から消えた通知済みエントリは捨てる
+        self._fired &= current
+        self._heap = [
+            (e.start - lead, i, e)
+            for i, e in enumerate(self._events)
+            if e.start > now and (e.key, e.start) not in self._fired
+        ]
+        heapq.heapify(self._heap)
+        self._arm()
+
+    def _arm(self):
+        if not self.enabled or not self._heap:
+            self._timer.cancel()
+            return
+        self._timer.arm(self._heap[0][0], self._fire)
+
+    def _fire(self):
+        now = self._now()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, event = heapq.heappop(self._heap)
+            if event.start <= now:
+                continue  # 既に始まっている
+            self._fired.add((event.key, event.start))
+            minutes_left = round((event.start - now).total_seconds() / 60)
+            self.on_alert(event, minutes_left)
+        self._arm()
@@ -0,0 +1,231 @@
+"""予定の取得・解析・描画のベンチマーク。
+
+ローカルの代役サーバー（fake_calendar_server）に向けて、1日あたりの予定数・
+通信遅延・ページサイズの組み合わせごとに以下を計測し、中央値を表示する。
+
+- fetch cold: ETagなしでget_events_for_dateを呼んだときの時間とHTTPリクエスト数
+- fetch 304:  同じ条件でもう一度呼んだとき（If-None-Matchで304になる）の時間
+- parse:      1日分のJSONのデコードとEventへの変換・日付への振り分け
+- render:     CalendarWidget._update_displayで予定を表示するまで（初回）
+- memory:     取得から振り分けまでのtracemallocのピーク（時間とは別の取得で測る）
+
+    python benchmarks/bench_fetch.py
+    python benchmarks/bench_fetch.py --events 10,100,1000 --latency-ms 0,100 --page-size 2500,250
+    python benchmarks/bench_fetch.py --no-render --json
+
+ネットワークには接続しない（トークンは一時ディレクトリに置いた偽物を使う）。
+描画の計測にはTkの表示が必要なので、ディスプレイのないLinuxでは xvfb-run 経由で
+実行するか、XvfbがPATHにあれば自動で起動したものを使う。どちらもなければ描画は計測しない。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import tempfile
+import itertools
+import statistics
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_calendar_server import FakeCalendar, FakeCalendarServer  # noqa: E402
+
+BENCH_DATE = datetime.date(2026, 10, 19)  # 計測に使う表示日（平日）
+
+
+def _write_token(base_dir, root_url):
+    """期限が十分先のアクセストークンを書き込む。更新先も代役サーバーに向ける。"""
+    expiry = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=365)
+    token = {
+        "token": "bench-token",
+        "refresh_token": "bench-refresh",
+        "token_uri": root_url + "token",
+        "client_id": "bench.apps.googleusercontent.com",
+        "client_secret": "bench",
+        "scopes": [
+            "https://www.googleapis.com/auth/calendar.readonly",
+            "https://www.googleapis.com/auth/userinfo.email",
+        ],
+        "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    with open(os.path.join(base_dir, "token.json"), "w") as f:
+        json.dump(token, f)
+
+
+def _ensure_display():
+    """描画できるディスプレイを用意する。用意できなければFalse。"""
+    if sys.platform != "linux" or os.environ.get("DISPLAY"):
+        return True
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return False
+    display = ":87"
+    proc = subprocess.Popen(
+        [xvfb, display, "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    time.sleep(0.5)
+    if proc.poll() is not None:
+        return False
+    os.environ["DISPLAY"] = display
+    import atexit
+    atexit.register(proc.terminate)
+    return True
+
+
+def _median(values):
+    return statistics.median(values) if values else None
+
+
+class Renderer:
+    """ネットワークやトレイを起動しないCalendarWidgetを1つ作り、描画時間を測る。"""
+
+    def __init__(self):
+        import widget
+
+        widget.CalendarWidget._finish_startup = lambda self: None
+        self.app = widget.CalendarWidget()
+        self.app.root.update()
+
+    def render(self, events, tz_name):
+        app = self.app
+        # 計測ごとに前回の表示を片付け、初回描画と同じ状態から測る
+        app._clear_events_frame()
+        app.display_date = BENCH_DATE
+        app._update_date_label()
+        app.root.update()
+        started = time.perf_counter()
+        app._on_events_fetched(events, tz_name)
+        app.root.update()
+        return time.perf_counter() - started
+
+    def close(self):
+        self.app.root.destroy()
+
+
+def run_scenario(calendar_api, server, events_per_day, latency_ms, page_size, runs, renderer):
+    fake = server.fake
+    fake.events_per_day = events_per_day
+    fake.page_size = page_size
+    server.latency_ms = latency_ms
+
+    cold, warm, parse, render, peaks = [], [], [], [], []
+    requests = None
+    for _ in range(runs):
+        calendar_api._etag_cache.clear()
+        fake.reset_counters()
+        started = time.perf_counter()
+        result = calendar_api.get_events_for_date(BENCH_DATE)
+        cold.append(time.perf_counter() - started)
+        requests = fake.request_count
+
+        # tracemallocは時間を大きく歪めるので、メモリは別の取得で測る
+        calendar_api._etag_cache.clear()
+        tracemalloc.start()
+        calendar_api.get_events_for_date(BENCH_DATE)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        calendar_api.get_events_for_date(BENCH_DATE)
+        warm.append(time.perf_counter() - started)
+
+        # サーバーが返すのと同じJSONで解析だけを測る
+        payload = json.dumps({"items": fake.events_for_day("primary", BENCH_DATE)})
+        cal_tz = calendar_api.get_timezone()
+        started = time.perf_counter()
+        items = json.loads(payload)["items"]
+        events = [calendar_api.parse_event(item, "primary", cal_tz) for item in items]
+        calendar_api.bucket_by_day(events, cal_tz, BENCH_DATE, BENCH_DATE + datetime.timedelta(days=1))
+        parse.append(time.perf_counter() - started)
+
+        if renderer is not None:
+            render.append(renderer.render(result["events"], result["timezone"]))
+
+    return {
+        "events": events_per_day,
+        "latency_ms": latency_ms,
+        "page_size": page_size,
+        "requests": requests,
+        "fetch_cold_ms": _median(cold) * 1000,
+        "fetch_304_ms": _median(warm) * 1000,
+        "parse_ms": _median(parse) * 1000,
+        "render_ms": _median(render) * 1000 if render else None,
+        "peak_kib": _median(peaks) / 1024,
+    }
+
+
+def _print_table(rows):
+    header = (
+        f"{'events':>6} {'latency':>8} {'page':>5} {'reqs':>4} "
+        f"{'fetch cold':>11} {'fetch 304':>10} {'parse':>8} {'render':>9} {'peak mem':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        render = f"{r['render_ms']:7.1f}ms" if r["render_ms"] is not None else "        -"
+        print(
+            f"{r['events']:>6} {r['latency_ms']:>6.0f}ms {r['page_size']:>5} {r['requests']:>4} "
+            f"{r['fetch_cold_ms']:9.1f}ms {r['fetch_304_ms']:8.1f}ms {r['parse_ms']:6.1f}ms "
+            f"{render} {r['peak_kib']:7.0f}KiB"
+        )
+
+
+def _int_list(text):
+    return [int(v) for v in text.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=_int_list, default=[10, 100, 1000],
+                        help="1日あたりの予定数（カンマ区切り）")
+    parser.add_argument("--latency-ms", type=_int_list, default=[0, 100],
+                        help="1リクエストあたりの遅延（カンマ区切り）")
+    parser.add_argument("--page-size", type=_int_list, default=[2500, 250],
+                        help="サーバー側のページサイズ上限（カンマ区切り）")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--no-render", action="store_true", help="描画は計測しない")
+    parser.add_argument("--json", action="store_true", help="結果をJSON Linesで出力する")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="calendar-bench-")
+    server = FakeCalendarServer(FakeCalendar()).start()
+    try:
+        # calendar_apiはimport時に接続先と保存先を決めるので、先に環境変数を設定する
+        os.environ["CALENDAR_WIDGET_DIR"] = work_dir
+        os.environ["CALENDAR_API_ROOT_URL"] = server.root_url
+        _write_token(work_dir, server.root_url)
+        import calendar_api
+
+        renderer = None
+        if not args.no_render:
+            if _ensure_display():
+                renderer = Renderer()
+            else:
+                print("no display (run under xvfb-run): render time is not measured", file=sys.stderr)
+
+        # サービスの構築とタイムゾーンの取得は計測に含めない
+        calendar_api.get_timezone()
+
+        rows = []
+        for events, latency, page_size in itertools.product(args.events, args.latency_ms, args.page_size):
+            row = run_scenario(calendar_api, server, events, latency, page_size, args.runs, renderer)
+            if args.json:
+                print(json.dumps(row), flush=True)
+            rows.append(row)
+        if not args.json:
+            _print_table(rows)
+        if renderer is not None:
+            renderer.close()
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
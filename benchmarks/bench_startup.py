@@ -0,0 +1,101 @@
+"""起動時間のベンチマーク。
+
+widgetモジュールのimport時間と、CalendarWidgetの最初の描画までの時間を
+新しいPythonプロセスで複数回計測し、中央値を表示する。最初の描画の時点で
+重いモジュール（Google APIクライアント・pystray・PIL）が読み込まれていないかも確認する。
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --check --max-first-paint-ms 300
+
+Tkの表示が必要なので、ディスプレイのないLinuxでは xvfb-run 経由で実行する。
+保存先（CALENDAR_WIDGET_DIR）は毎回空の一時ディレクトリにするので、利用者の
+ディスクキャッシュやログを読み書きせず、常に初回起動（未ログイン）の状態を計測する。
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 最初の描画までに読み込まれてはいけないモジュール
+HEAVY_MODULES = (
+    "googleapiclient", "google_auth_oauthlib", "google.oauth2", "google_auth_httplib2",
+    "httplib2", "pystray", "PIL",
+)
+
+PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import widget
+t1 = time.perf_counter()
+heavy = {heavy!r}
+
+def loaded():
+    return sorted(m for m in heavy if m in sys.modules)
+
+result = {{"import_ms": (t1 - t0) * 1000, "heavy_after_import": loaded()}}
+
+def on_first_paint(self):
+    # _finish_startupは最初の描画後に呼ばれる。ネットワークやトレイは起動しない
+    result["first_paint_ms"] = (time.perf_counter() - t0) * 1000
+    result["heavy_at_first_paint"] = loaded()
+    self.root.quit()
+
+widget.CalendarWidget._finish_startup = on_first_paint
+app = widget.CalendarWidget()
+app.root.mainloop()
+app.root.destroy()
+print(json.dumps(result))
+"""
+
+
+def run_once():
+    code = PROBE.format(heavy=HEAVY_MODULES)
+    work_dir = tempfile.mkdtemp(prefix="calendar-bench-")
+    try:
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+            env=dict(os.environ, CALENDAR_WIDGET_DIR=work_dir),
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if out.returncode != 0:
+        sys.exit(f"probe failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true",
+                        help="重いモジュールが最初の描画前に読み込まれていたら失敗にする")
+    parser.add_argument("--max-first-paint-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    paint_ms = statistics.median(r["first_paint_ms"] for r in results)
+    heavy = sorted({m for r in results for m in r["heavy_at_first_paint"]})
+
+    print(f"runs:              {args.runs}")
+    print(f"import widget:     {import_ms:8.1f} ms (median)")
+    print(f"first paint:       {paint_ms:8.1f} ms (median)")
+    print(f"heavy modules at first paint: {', '.join(heavy) or 'none'}")
+
+    failed = False
+    if args.check and heavy:
+        print("FAIL: heavy modules were imported before the first paint")
+        failed = True
+    if args.max_first_paint_ms is not None and paint_ms > args.max_first_paint_ms:
+        print(f"FAIL: first paint {paint_ms:.1f} ms > {args.max_first_paint_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""ベンチマーク用のGoogle Calendar APIの代役サーバー。
+
+ウィジェットが使うエンドポイントだけを、生成した予定で応答する。
+
+- GET  /calendar/v3/calendars/{id}                  タイムゾーン
+- GET  /calendar/v3/users/me/calendarList           カレンダー一覧
+- GET  /calendar/v3/calendars/{id}/events           予定一覧（ページ分割・syncToken・ETag/304）
+- GET  /calendar/v3/calendars/{id}/events/{eventId} 予定の詳細
+- POST /calendar/v3/freeBusy                        空き状況
+- POST /batch/calendar/v3                           HTTPバッチ（multipart/mixed）
+- GET  /oauth2/v2/userinfo                          アカウント情報
+- POST /token                                       アクセストークンの更新
+
+単体でも起動できる（calendar_apiは環境変数 CALENDAR_API_ROOT_URL で接続先を切り替える）。
+
+    python benchmarks/fake_calendar_server.py --events-per-day 100 --latency-ms 50
+"""
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+from zoneinfo import ZoneInfo
+
+
+class FakeCalendar:
+    """予定の生成とAPIの応答内容の組み立てを受け持つ。HTTPには依存しない。"""
+
+    def __init__(self, events_per_day=10, page_size=2500, timezone="Asia/Tokyo",
+                 calendars=("primary",), allday_every=10, expire_sync_tokens=False):
+        self.events_per_day = events_per_day
+        self.page_size = page_size  # サーバー側のページサイズ上限（maxResultsより小さければこちら）
+        self.timezone = timezone
+        self.calendars = list(calendars)
+        self.allday_every = allday_every  # この件数ごとに1件を終日の予定にする（0で終日なし）
+        self.expire_sync_tokens = expire_sync_tokens  # Trueならすべての同期トークンに410を返す
+        self.revision = 1  # 変えると全予定のETagが変わる（予定が更新された扱い）
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.bytes_sent = 0
+
+    def count(self, nbytes):
+        with self._lock:
+            self.request_count += 1
+            self.bytes_sent += nbytes
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_count = 0
+            self.bytes_sent = 0
+
+    def events_for_day(self, calendar_id, day):
+        """1日分の予定リソースを開始時刻順に生成する。"""
+        tz = ZoneInfo(self.timezone)
+        n = self.events_per_day
+        items = []
+        # 8:00〜20:00に均等に並べ、一部は前後の予定と重なる長さにする
+        span = 12 * 60
+        for i in range(n):
+            event_id = f"{calendar_id.replace('@', '_')}{day:%Y%m%d}n{i:05d}"
+            item = {
+                "kind": "calendar#event",
+                "etag": f'"{self.revision}{i}"',
+                "id": event_id,
+                "status": "confirmed",
+                "summary": f"予定 {day:%m/%d} #{i + 1}",
+            }
+            if i % 3 == 0:
+                item["location"] = f"会議室 {i % 7 + 1}"
+            if self.allday_every and i % self.allday_every == self.allday_every - 1:
+                item["start"] = {"date": day.isoformat()}
+                item["end"] = {"date": (day + datetime.timedelta(days=1)).isoformat()}
+            else:
+                minute = 8 * 60 + span * i // max(n, 1)
+                start = datetime.datetime(day.year, day.month, day.day, tzinfo=tz) + \
+                    datetime.timedelta(minutes=minute)
+                end = start + datetime.timedelta(minutes=30 + (i % 4) * 15)
+                item["start"] = {"dateTime": start.isoformat(), "timeZone": self.timezone}
+                item["end"] = {"dateTime": end.isoformat(), "timeZone": self.timezone}
+            items.append(item)
+        # orderBy=startTime と同じく終日の予定を先頭にする
+        items.sort(key=lambda it: it["start"].get("date") or it["start"]["dateTime"])
+        return items
+
+    def events_for_range(self, calendar_id, time_min, time_max):
+        tz = ZoneInfo(self.timezone)
+        first = datetime.datetime.fromisoformat(time_min).astimezone(tz).date()
+        last = datetime.datetime.fromisoformat(time_max).astimezone(tz).date()
+        items = []
+        day = first
+        while day < last:
+            items.extend(self.events_for_day(calendar_id, day))
+            day += datetime.timedelta(days=1)
+        return items
+
+    def _etag(self, calendar_id, query):
+        key = json.dumps([self.revision, calendar_id, sorted(query.items())], ensure_ascii=False)
+        return '"' + hashlib.sha1(key.encode()).hexdigest()[:16] + '"'
+
+    def list_events(self, calendar_id, query, if_none_match=None):
+        """events().listの応答を (ステータス, 本文dict, 追加ヘッダー) で返す。"""
+        if calendar_id not in self.calendars:
+            return 404, _error(404, "Not Found"), {}
+        sync_token = query.get("syncToken")
+        if sync_token is not None:
+            if self.expire_sync_tokens or sync_token != f"sync-{self.revision}":
+                return 410, _error(410, "Sync token is no longer valid, a full sync is required."), {}
+            # 前回から変更なし
+            return 200, {
+                "kind": "calendar#events", "etag": self._etag(calendar_id, query),
+                "items": [], "nextSyncToken": f"sync-{self.revision}",
+            }, {}
+
+        page_query = {k: v for k, v in query.items() if k != "pageToken"}
+        etag = self._etag(calendar_id, page_query)
+        if if_none_match and if_none_match == etag and "pageToken" not in query:
+            return 304, None, {"ETag": etag}
+
+        if "timeMin" in query and "timeMax" in query:
+            items = self.events_for_range(calendar_id, query["timeMin"], query["timeMax"])
+        else:
+            # 同期用の全件取得。表示日付近の2週間分を返す
+            today = datetime.date.today()
+            items = self.events_for_range(
+                calendar_id,
+                datetime.datetime.combine(today - datetime.timedelta(days=7), datetime.time()).isoformat() + "Z",
+                datetime.datetime.combine(today + datetime.timedelta(days=7), datetime.time()).isoformat() + "Z",
+            )
+        page_size = min(int(query.get("maxResults", 250)), self.page_size)
+        offset = int(query.get("pageToken", 0))
+        body = {
+            "kind": "calendar#events",
+            "etag": etag,
+            "summary": calendar_id,
+            "timeZone": self.timezone,
+            "items": items[offset:offset + page_size],
+        }
+        if offset + page_size < len(items):
+            body["nextPageToken"] = str(offset + page_size)
+        else:
+            body["nextSyncToken"] = f"sync-{self.revision}"
+        return 200, body, {"ETag": etag}
+
+    def get_event(self, calendar_id, event_id):
+        for item in self.events_for_day(calendar_id, _day_of(event_id)):
+            if item["id"] == event_id:
+                return 200, dict(item, description="ベンチマーク用の予定です。")
+        return 404, _error(404, "Not Found")
+
+    def free_busy(self, query):
+        """freebusy().queryの応答。終日でない予定の時間帯を重なりをまとめて返す。"""
+        calendars = {}
+        for entry in query.get("items", []):
+            calendar_id = entry["id"]
+            if calendar_id not in self.calendars:
+                calendars[calendar_id] = {"errors": [{"domain": "global", "reason": "notFound"}], "busy": []}
+                continue
+            intervals = []
+            for item in self.events_for_range(calendar_id, query["timeMin"], query["timeMax"]):
+                if "dateTime" not in item["start"]:
+                    continue
+                start = datetime.datetime.fromisoformat(item["start"]["dateTime"])
+                end = datetime.datetime.fromisoformat(item["end"]["dateTime"])
+                if intervals and start <= intervals[-1][1]:
+                    intervals[-1][1] = max(intervals[-1][1], end)
+                else:
+                    intervals.append([start, end])
+            calendars[calendar_id] = {"busy": [
+                {"start": _utc(start), "end": _utc(end)} for start, end in intervals
+            ]}
+        return {
+            "kind": "calendar#freeBusy", "timeMin": query["timeMin"], "timeMax": query["timeMax"],
+            "calendars": calendars,
+        }
+
+    def calendar_list(self):
+        items = []
+        for calendar_id in self.calendars:
+            items.append({
+                "kind": "calendar#calendarListEntry",
+                "id": "bench@example.com" if calendar_id == "primary" else calendar_id,
+                "summary": calendar_id,
+                "backgroundColor": "#89b4fa",
+                "primary": calendar_id == "primary",
+            })
+        return {"kind": "calendar#calendarList", "items": items}
+
+
+def _error(code, message):
+    return {"error": {"code": code, "message": message, "errors": [{"message": message}]}}
+
+
+def _utc(value):
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _day_of(event_id):
+    """生成した予定IDから日付を取り出す（"...YYYYMMDDnNNNNN"）。"""
+    stamp = event_id.rsplit("n", 1)[0][-8:]
+    return datetime.date(int(stamp[:4]), int(stamp[4:6]), int(stamp[6:]))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeCalendar/1.0"
+    # ヘッダーと本文を別々に書くので、Nagleと遅延ACKで応答が40ms遅れないようにする
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def _route(self, method, target, headers, body):
+        """(ステータス, 本文dict, 追加ヘッダー) を返す。"""
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+
+        if method == "GET" and parts[:2] == ["oauth2", "v2"] and parts[2:] == ["userinfo"]:
+            return 200, {"id": "1", "email": "bench@example.com", "verified_email": True}, {}
+        if method == "POST" and parts == ["token"]:
+            return 200, {"access_token": "bench-token", "expires_in": 3600, "token_type": "Bearer"}, {}
+        if parts[:2] != ["calendar", "v3"]:
+            return 404, _error(404, "Not Found"), {}
+        rest = parts[2:]
+        if method == "POST" and rest == ["freeBusy"]:
+            return 200, self.fake.free_busy(json.loads(body or b"{}")), {}
+        if method == "GET" and rest == ["users", "me", "calendarList"]:
+            return 200, self.fake.calendar_list(), {}
+        if method == "GET" and len(rest) == 2 and rest[0] == "calendars":
+            return 200, {"kind": "calendar#calendar", "id": rest[1], "timeZone": self.fake.timezone}, {}
+        if method == "GET" and len(rest) == 3 and rest[0] == "calendars" and rest[2] == "events":
+            return self.fake.list_events(rest[1], query, headers.get("If-None-Match"))
+        if method == "GET" and len(rest) == 4 and rest[0] == "calendars" and rest[2] == "events":
+            status, item = self.fake.get_event(rest[1], rest[3])
+            return status, item, {}
+        return 404, _error(404, "Not Found"), {}
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if method == "POST" and urlsplit(self.path).path.rstrip("/") == "/batch/calendar/v3":
+            content_type, payload = self._batch(body)
+            self._send(200, payload, {"Content-Type": content_type})
+            return
+        status, data, extra = self._route(method, self.path, self.headers, body)
+        payload = b"" if data is None else json.dumps(data, ensure_ascii=False).encode()
+        headers = dict(extra)
+        if data is not None:
+            headers["Content-Type"] = "application/json; charset=UTF-8"
+        self._send(status, payload, headers)
+
+    def _batch(self, body):
+        """multipart/mixedのバッチ要求を1件ずつ処理し、同じ形式で応答を返す。"""
+        raw = b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body
+        message = BytesParser(policy=HTTP).parsebytes(raw)
+        boundary = "batch_" + hashlib.sha1(body).hexdigest()[:16]
+        out = []
+        for part in message.iter_parts():
+            request = part.get_payload(decode=True)
+            head, _, inner_body = request.partition(b"\r\n\r\n")
+            lines = head.decode().split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+            status, data, extra = self._route(method, target, headers, inner_body)
+            payload = "" if data is None else json.dumps(data, ensure_ascii=False)
+            content_id = part.get("Content-ID", "").strip("<>")
+            response = [f"HTTP/1.1 {status} {self.responses.get(status, ('',))[0]}"]
+            response.extend(f"{k}: {v}" for k, v in extra.items())
+            response.append("Content-Type: application/json; charset=UTF-8")
+            out.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                + "\r\n".join(response) + "\r\n\r\n" + payload + "\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(out).encode()
+
+    def _send(self, status, payload, headers):
+        # クライアントが応答を受け取る前に数える（計測側が直後に件数を読むため）
+        self.fake.count(len(payload))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeCalendarServer:
+    """FakeCalendarをバックグラウンドのスレッドでHTTP公開する。
+
+        with FakeCalendarServer(FakeCalendar(events_per_day=100), latency_ms=50) as server:
+            os.environ["CALENDAR_API_ROOT_URL"] = server.root_url
+    """
+
+    def __init__(self, fake=None, latency_ms=0, host="127.0.0.1", port=0):
+        self.fake = fake or FakeCalendar()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self.fake
+        self._httpd.latency = latency_ms / 1000
+        self._thread = None
+
+    @property
+    def latency_ms(self):
+        return self._httpd.latency * 1000
+
+    @latency_ms.setter
+    def latency_ms(self, value):
+        self._httpd.latency = value / 1000
+
+    @property
+    def root_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--events-per-day", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=2500)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--calendars", default="primary",
+                        help="カンマ区切りのカレンダーID")
+    parser.add_argument("--expire-sync-tokens", action="store_true")
+    args = parser.parse_args()
+
+    fake = FakeCalendar(
+        events_per_day=args.events_per_day, page_size=args.page_size,
+        calendars=args.calendars.split(","), expire_sync_tokens=args.expire_sync_tokens,
+    )
+    server = FakeCalendarServer(fake, latency_ms=args.latency_ms, port=args.port)
+    print(f"CALENDAR_API_ROOT_URL={server.root_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
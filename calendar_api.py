@@ -1,39 +1,553 @@
 import os
+import copy
 import sys
 import stat
+import json
+import time
+import heapq
+import hashlib
 import datetime
+import threading
+from collections import OrderedDict
 from zoneinfo import ZoneInfo
-from google.auth.transport.requests import AuthorizedSession, Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from event_model import Event
+from perf_stats import stats
+
+# google-api-python-client / google-auth は読み込みが重く起動を遅くするため、
+# モジュール先頭ではなく実際に使う関数の中でimportする
 
 SCOPES = [
     "https://www.googleapis.com/auth/calendar.readonly",
     "https://www.googleapis.com/auth/userinfo.email",
 ]
 
-if getattr(sys, 'frozen', False):
+if os.environ.get("CALENDAR_WIDGET_DIR"):
+    # トークンやキャッシュの置き場所を切り替える（ベンチマークなど）
+    BASE_DIR = os.environ["CALENDAR_WIDGET_DIR"]
+elif getattr(sys, 'frozen', False):
     BASE_DIR = os.path.dirname(sys.executable)
 else:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TOKEN_PATH = os.path.join(BASE_DIR, "token.json")
 CREDENTIALS_PATH = os.path.join(BASE_DIR, "credentials.json")
 
+TIMEZONE_CACHE_PATH = os.path.join(BASE_DIR, "timezone_cache.json")
+SETTINGS_PATH = os.path.join(BASE_DIR, "settings.json")
+PROFILE_CACHE_PATH = os.path.join(BASE_DIR, "profile.json")
+PERF_LOG_PATH = os.path.join(BASE_DIR, "perf_log.jsonl")
+
+# Google APIの接続先。ベンチマーク用のローカルサーバーなどに向けるときだけ環境変数で指定する
+API_ROOT_URL = os.environ.get("CALENDAR_API_ROOT_URL", "https://www.googleapis.com/")
+USERINFO_URL = API_ROOT_URL + "oauth2/v2/userinfo"
+
+HTTP_TIMEOUT = 30  # 秒
+TOKEN_REFRESH_MARGIN = 5 * 60  # 秒。アクセストークンの期限のこれだけ前に更新する
+TOKEN_REFRESH_RETRY = 60  # 秒。バックグラウンド更新に失敗したときの再試行間隔
+EVENTS_PAGE_SIZE = 2500  # events().list の1ページあたりの最大件数（APIの上限）
+# GoogleのAPIはUser-Agentに"gzip"を含む場合のみレスポンスをgzip圧縮する
+USER_AGENT = "TodayGoogleCalender (gzip)"
+# 一覧取得ではウィジェットが使う項目だけを返させる（説明・参加者などは詳細取得時に取る）
+EVENT_LIST_FIELDS = (
+    "etag,nextPageToken,nextSyncToken,"
+    "items(id,status,summary,location,start,end)"
+)
+# 繰り返し予定をローカルで展開するとき（singleEvents=False）は親予定と例外の情報も要る
+RECURRING_LIST_FIELDS = (
+    "etag,nextPageToken,nextSyncToken,"
+    "items(id,etag,status,summary,location,start,end,recurrence,recurringEventId,originalStartTime)"
+)
+# 期間内の回を期間外へ移動した例外はtimeMin/timeMaxで除かれ、元の時刻の回が展開されて
+# しまう（サーバーは返さない予定が出る）。繰り返し予定をローカルで展開するときは、期間の
+# 前後この日数を例外の元の時刻だけの最小限の項目で別に問い合わせ、この日数以内の移動までは拾う。
+RECURRENCE_MOVE_MARGIN_DAYS = 31
+MOVED_EXCEPTION_FIELDS = "nextPageToken,items(recurringEventId,originalStartTime,status)"
+BATCH_MAX_REQUESTS = 50  # HTTPバッチ1回に入れられるリクエスト数の上限（Calendar API）
+FREEBUSY_MAX_CALENDARS = 50  # freebusy().query 1回で問い合わせられるカレンダー数の上限
+EVENT_DETAIL_CACHE_SIZE = 64
+ETAG_CACHE_SIZE = 32
+RECURRENCE_CACHE_SIZE = 256
+TIMEZONE_CACHE_TTL = 24 * 60 * 60  # 秒
+
+
+class CredentialManager:
+    """token.jsonを一度だけ読み込んでメモリに保持する認証情報の管理。
+
+    ファイルはアクセスのたびに更新時刻だけを確認し、外部で書き換えられたときだけ
+    読み直す。アクセストークンは期限の少し前にバックグラウンドで更新し、
+    内容が変わったときだけtoken.jsonに書き込む。
+    """
+
+    def __init__(self, path=TOKEN_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._creds = None
+        self._file_stamp = None  # 最後に読み書きしたときの (mtime_ns, size)
+        self._written = None     # 最後に読み書きしたJSON
+        self._timer = None
+        self._refreshing = None  # 実行中のトークン更新（_PendingRefresh）
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _reload_if_changed(self):
+        stamp = self._stamp()
+        if stamp == self._file_stamp:
+            return
+        self._file_stamp = stamp
+        self._creds = None
+        self._written = None
+        if stamp is not None:
+            with stats.span("auth.load"):
+                from google.oauth2.credentials import Credentials
+                try:
+                    with open(self.path) as f:
+                        data = f.read()
+                    self._creds = Credentials.from_authorized_user_info(json.loads(data), SCOPES)
+                    self._written = data
+                except (OSError, ValueError):
+                    self._creds = None
+        self._schedule_refresh()
+
+    def is_logged_in(self):
+        with self._lock:
+            self._reload_if_changed()
+            creds = self._creds
+            return bool(creds and (creds.valid or (creds.expired and creds.refresh_token)))
+
+    def get(self):
+        """有効な認証情報を返す。期限切れなら（バックグラウンド更新が間に合わなかった場合のみ）その場で更新する。
+
+        ログインしていなければNone。更新の通信中はロックを持たないので、
+        is_logged_in()（Tkのスレッドから呼ばれる）を待たせない。
+        """
+        with self._lock:
+            self._reload_if_changed()
+            creds = self._creds
+            if creds is None:
+                return None
+            if creds.valid:
+                return creds
+            if not (creds.expired and creds.refresh_token):
+                return None
+        return self._refresh(background=False)
+
+    def set(self, creds):
+        """ログイン直後の認証情報を保持して保存する。"""
+        with self._lock:
+            self._creds = creds
+            self._save()
+            self._schedule_refresh()
+
+    def clear(self):
+        with self._lock:
+            self._cancel_timer()
+            self._creds = None
+            self._written = None
+            self._file_stamp = None
+
+    def _save(self):
+        data = self._creds.to_json()
+        if data == self._written:
+            return
+        with open(self.path, "w") as token_file:
+            token_file.write(data)
+        os.chmod(self.path, stat.S_IRUSR | stat.S_IWUSR)
+        self._written = data
+        self._file_stamp = self._stamp()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule_refresh(self, delay=None):
+        self._cancel_timer()
+        creds = self._creds
+        if creds is None or not creds.refresh_token:
+            return
+        if delay is None:
+            if creds.expiry is None:
+                return
+            # google-authのexpiryはタイムゾーンなしのUTC
+            now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            delay = max(0, (creds.expiry - now).total_seconds() - TOKEN_REFRESH_MARGIN)
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self._refresh(background=True)
+        except Exception:
+            stats.incr("auth.refresh_errors")
+            with self._lock:
+                if self._creds is not None and self._refreshing is None:
+                    self._schedule_refresh(TOKEN_REFRESH_RETRY)
+
+    def _refresh(self, background):
+        """アクセストークンを更新し、更新後の認証情報を返す（更新中にログアウトされたらNone）。
+
+        通信中にロックを持つとis_logged_in()が待たされるので、複製をロックの外で更新し、
+        終わってから差し替える。すでに別のスレッドが更新中なら、新たに通信せずその完了を待つ。
+        失敗した場合は例外を送出する（待っていた側にも同じ例外を送出する）。
+        """
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            current = self._creds
+            if current is None:
+                return None
+            pending = self._refreshing
+            if pending is None:
+                pending = self._refreshing = _PendingRefresh()
+                # refresh()は属性を代入し直すだけなので浅い複製で足りる
+                creds = copy.copy(current)
+            else:
+                creds = None
+        if creds is None:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            with self._lock:
+                return self._creds
+
+        try:
+            with stats.span("auth.refresh", background=background):
+                creds.refresh(Request())
+        except Exception as e:
+            pending.error = e
+            raise
+        else:
+            with self._lock:
+                if self._creds is not current:
+                    return None  # 更新中にログアウト・再ログイン・ファイルの読み直しがあった
+                self._creds = creds
+                try:
+                    self._save()
+                except OSError:
+                    pass
+                self._schedule_refresh()
+                return creds
+        finally:
+            with self._lock:
+                self._refreshing = None
+            pending.done.set()
+
+
+class _PendingRefresh:
+    """実行中のトークン更新。完了を待つ側はdoneを待ち、errorを確かめる。"""
+
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+def _timed_json_model():
+    """レスポンスのJSONデコードにかかった時間を"api.json"として記録するJsonModel。"""
+    from googleapiclient.model import JsonModel
+
+    class TimedJsonModel(JsonModel):
+        def deserialize(self, content):
+            with stats.span("api.json", bytes=len(content)):
+                return super().deserialize(content)
+
+    return TimedJsonModel()
+
+
+class CalendarClient:
+    """構築済みのCalendarサービスとkeep-aliveなHTTP接続を保持し、取得のたびに使い回す。
+
+    認証情報が変わったとき（login()/logout()後など）だけ作り直す。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._service = None
+        self._http = None
+        self._creds_key = None
+        self._build_seconds = 0.0  # サービスの構築にかかった秒数
+        self._cold_fetch = None    # 構築後最初のリクエストに（構築を含めて）かかった秒数
+        self._warm_fetches = []    # 接続を使い回した2回目以降のリクエストの秒数（直近のみ保持）
+
+    @staticmethod
+    def _credentials_key(creds):
+        """アカウントを識別するキー。アクセストークンの更新では変わらない。"""
+        return (creds.client_id, creds.refresh_token or creds.token)
+
+    def reset(self):
+        """保持しているサービスと接続を破棄する。次回取得時に作り直される。"""
+        with self._lock:
+            if self._http is not None:
+                for conn in self._http.http.connections.values():
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._service = None
+            self._http = None
+            self._creds_key = None
+            self._build_seconds = 0.0
+            self._cold_fetch = None
+            self._warm_fetches = []
+
+    def account_id(self):
+        """現在のアカウントを識別するハッシュ値。未構築ならNone。"""
+        with self._lock:
+            if self._creds_key is None:
+                return None
+            return hashlib.sha256(repr(self._creds_key).encode()).hexdigest()
+
+    def service(self):
+        """Calendarサービスを返す。認証情報が変わっていれば作り直す。"""
+        with self._lock:
+            # 認証情報はメモリ上のものを返すだけなので、毎回確認しても軽い
+            creds = get_credentials()
+            key = self._credentials_key(creds)
+            if self._service is None or key != self._creds_key:
+                import httplib2
+                from google_auth_httplib2 import AuthorizedHttp
+                from googleapiclient.discovery import build
+                from googleapiclient.http import set_user_agent
+
+                self.reset()
+                started = time.perf_counter()
+                with stats.span("api.build"):
+                    self._http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+                    # httplib2は既定で Accept-Encoding: gzip を送る
+                    set_user_agent(self._http, USER_AGENT)
+                    self._service = build(
+                        "calendar", "v3", http=self._http, model=_timed_json_model(),
+                        client_options={"api_endpoint": API_ROOT_URL + "calendar/v3/"},
+                    )
+                self._creds_key = key
+                self._build_seconds = time.perf_counter() - started
+            elif self._http.credentials is not creds:
+                # 同じアカウントでトークンだけ更新された場合は接続を維持する
+                self._http.credentials = creds
+            return self._service
+
+    def execute(self, request):
+        """リクエストを実行する。httplib2.Httpはスレッドセーフではないため直列化する。"""
+        stats.incr("api.calls")
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                with stats.span("api.request", method=getattr(request, "methodId", None) or "batch"):
+                    return request.execute()
+            finally:
+                self._record_request(time.perf_counter() - started)
+
+    def new_batch(self, callback):
+        """API_ROOT_URL宛てのHTTPバッチリクエストを作る。"""
+        from googleapiclient.http import BatchHttpRequest
+
+        # service.new_batch_http_request()は接続先の変更を反映しないため直接作る
+        return BatchHttpRequest(callback=callback, batch_uri=API_ROOT_URL + "batch/calendar/v3")
+
+    def get_json(self, url):
+        """保持している接続でURLをGETし、JSONを返す。200以外ならNone。"""
+        self.service()
+        stats.incr("api.calls")
+        with self._lock:
+            started = time.perf_counter()
+            with stats.span("api.request", method=url):
+                resp, content = self._http.request(url, "GET")
+            self._record_request(time.perf_counter() - started)
+        if resp.status != 200:
+            return None
+        return json.loads(content)
+
+    def _record_request(self, seconds):
+        """リクエストにかかった時間を記録する。構築後最初のものは構築時間を足してコールドとする。"""
+        with self._lock:
+            if self._cold_fetch is None:
+                self._cold_fetch = self._build_seconds + seconds
+            else:
+                self._warm_fetches.append(seconds)
+                del self._warm_fetches[:-50]
+
+    def fetch_timings(self):
+        """コールド（サービス構築と最初のリクエスト）とウォーム（2回目以降の平均）の時間を秒で返す。"""
+        with self._lock:
+            warm = self._warm_fetches
+            return {
+                "cold": self._cold_fetch,
+                "warm_avg": sum(warm) / len(warm) if warm else None,
+                "warm_count": len(warm),
+            }
+
+
+class TimezoneCache:
+    """カレンダーのタイムゾーンをTTL付きでメモリとファイルにキャッシュする。"""
+
+    def __init__(self, path=TIMEZONE_CACHE_PATH, ttl=TIMEZONE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entry = None  # {"timezone": str, "account": str, "fetched_at": float}
+
+    def _load(self):
+        if self._entry is None and self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entry = json.load(f)
+            except (OSError, ValueError):
+                self._entry = None
+        return self._entry
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._entry, f)
+        except OSError:
+            pass
+
+    def get(self, service, account):
+        """キャッシュが有効ならそれを、期限切れやアカウント変更時はAPIから取得して返す。"""
+        with self._lock:
+            entry = self._load()
+            if (
+                entry
+                and entry.get("account") == account
+                and time.time() - entry.get("fetched_at", 0) < self.ttl
+            ):
+                try:
+                    tz = ZoneInfo(entry["timezone"])
+                except (KeyError, ValueError):
+                    pass
+                else:
+                    stats.cache("timezone", True)
+                    return tz
+        stats.cache("timezone", False)
+        tz = get_calendar_timezone(service)
+        with self._lock:
+            self._entry = {"timezone": str(tz), "account": account, "fetched_at": time.time()}
+            self._save()
+        return tz
+
+    def invalidate(self):
+        """キャッシュを破棄する。"""
+        with self._lock:
+            self._entry = None
+            if self.path and os.path.exists(self.path):
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+
+class LRUCache:
+    """件数上限付きのLRUキャッシュ。イベント詳細やETag付きの一覧結果の保持に使う。"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, item):
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class ProfileCache:
+    """ログイン中アカウントのプロフィール（userinfo）をメモリとファイルにキャッシュする。"""
+
+    def __init__(self, path=PROFILE_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profile = None
+        self._loaded = False
+
+    def get(self):
+        """キャッシュ済みのプロフィールを返す。なければNone（通信はしない）。"""
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._profile = json.load(f)
+                except (OSError, ValueError):
+                    self._profile = None
+            return self._profile
+
+    def put(self, profile):
+        with self._lock:
+            self._profile = profile
+            self._loaded = True
+            try:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(profile, f, ensure_ascii=False)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._profile = None
+            self._loaded = True
+            if os.path.exists(self.path):
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+
+_credentials = CredentialManager()
+_client = CalendarClient()
+_timezone_cache = TimezoneCache()
+_profile_cache = ProfileCache()
+_detail_cache = LRUCache(EVENT_DETAIL_CACHE_SIZE)  # (calendar_id, event_id) -> イベントリソース
+_etag_cache = LRUCache(ETAG_CACHE_SIZE)  # 一覧の取得条件 -> (etag, 予定リスト)
+_recurrence_cache = LRUCache(RECURRENCE_CACHE_SIZE)  # (親予定, etag, 期間) -> 展開した予定リスト
+
+
+def get_client():
+    """共有のCalendarClientを返す。"""
+    return _client
+
+
+def get_fetch_timings():
+    """予定取得のコールド/ウォーム時間を返す。"""
+    return _client.fetch_timings()
+
 
 def is_logged_in():
     """トークンが存在し有効かどうかを返す。"""
-    if not os.path.exists(TOKEN_PATH):
-        return False
-    try:
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
-        return creds and creds.valid or (creds and creds.expired and creds.refresh_token)
-    except Exception:
-        return False
+    return _credentials.is_logged_in()
 
 
 def logout():
     """トークンを削除してログアウトする。"""
+    _credentials.clear()
+    _client.reset()
+    _timezone_cache.invalidate()
+    _profile_cache.clear()
+    _detail_cache.clear()
+    _etag_cache.clear()
+    _recurrence_cache.clear()
     if os.path.exists(TOKEN_PATH):
         try:
             os.remove(TOKEN_PATH)
@@ -41,20 +555,30 @@ def logout():
             pass
 
 
-def get_user_email():
-    """ログイン中のGoogleアカウントのメールアドレスを返す。未ログインや取得失敗時はNone。"""
+def get_cached_profile():
+    """キャッシュ済みのアカウント情報（"email"など）を返す。通信はしないのでUIスレッドから呼べる。"""
+    return _profile_cache.get()
+
+
+def fetch_user_profile():
+    """userinfoからアカウント情報を取得してキャッシュする。未ログインや取得失敗時はNone。"""
     if not is_logged_in():
         return None
     try:
-        creds = get_credentials()
-        session = AuthorizedSession(creds)
-        resp = session.get("https://www.googleapis.com/oauth2/v2/userinfo")
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        return data.get("email") or None
+        profile = _client.get_json(USERINFO_URL)
     except Exception:
         return None
+    if profile:
+        _profile_cache.put(profile)
+    return profile
+
+
+def get_user_email():
+    """ログイン中のGoogleアカウントのメールアドレスを返す。未ログインや取得失敗時はNone。"""
+    profile = get_cached_profile() if is_logged_in() else None
+    if profile is None:
+        profile = fetch_user_profile()
+    return (profile or {}).get("email") or None
 
 
 def login():
@@ -65,92 +589,456 @@ def login():
             "SETUP.md を参照して Google Cloud Console から\n"
             "OAuth クライアントIDをダウンロードしてください。"
         )
+    from google_auth_oauthlib.flow import InstalledAppFlow
     flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
     creds = flow.run_local_server(port=0)
-    with open(TOKEN_PATH, "w") as token_file:
-        token_file.write(creds.to_json())
-    os.chmod(TOKEN_PATH, stat.S_IRUSR | stat.S_IWUSR)
+    _credentials.set(creds)
+    _client.reset()
+    _timezone_cache.invalidate()
+    _profile_cache.clear()
+    _detail_cache.clear()
+    _etag_cache.clear()
+    _recurrence_cache.clear()
     return creds
 
 
 def get_credentials():
     """OAuth認証を行い、認証情報を返す。初回はブラウザで認証。"""
-    creds = None
-
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            if not os.path.exists(CREDENTIALS_PATH):
-                raise FileNotFoundError(
-                    "credentials.json が見つかりません。\n"
-                    "SETUP.md を参照して Google Cloud Console から\n"
-                    "OAuth クライアントIDをダウンロードしてください。"
-                )
-            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
-            creds = flow.run_local_server(port=0)
-
-        with open(TOKEN_PATH, "w") as token_file:
-            token_file.write(creds.to_json())
-        os.chmod(TOKEN_PATH, stat.S_IRUSR | stat.S_IWUSR)
-
+    creds = _credentials.get()
+    if creds is None:
+        creds = login()
     return creds
 
 
 def get_calendar_timezone(service):
     """Google Calendarのプライマリカレンダーのタイムゾーンを取得する。"""
-    calendar = service.calendars().get(calendarId="primary").execute()
+    calendar = _client.execute(service.calendars().get(calendarId="primary", fields="timeZone"))
     tz_name = calendar.get("timeZone", "UTC")
     return ZoneInfo(tz_name)
 
 
-def get_events_for_date(target_date=None):
-    """指定日の予定を取得して返す。target_dateはdatetime.dateオブジェクト。"""
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
+def get_timezone():
+    """キャッシュ経由でGoogleカレンダーのタイムゾーンを返す。"""
+    return _timezone_cache.get(_client.service(), _client.account_id())
 
-    # Googleカレンダーのタイムゾーンを使用（PCの時間ではなくカレンダー設定に従う）
-    cal_tz = get_calendar_timezone(service)
 
-    if target_date is None:
-        target_date = datetime.datetime.now(cal_tz).date()
+def _load_settings():
+    if not os.path.exists(SETTINGS_PATH):
+        return {}
+    try:
+        with open(SETTINGS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_settings(settings):
+    with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=2)
+
+
+def get_selected_calendars():
+    """表示対象のカレンダーIDのリストを返す。未設定ならプライマリのみ。"""
+    calendars = _load_settings().get("calendars")
+    return list(calendars) if calendars else ["primary"]
+
+
+def set_selected_calendars(calendar_ids):
+    """表示対象のカレンダーIDを保存する。"""
+    settings = _load_settings()
+    settings["calendars"] = list(calendar_ids) or ["primary"]
+    _save_settings(settings)
+
+
+def get_free_busy_calendars():
+    """空き状況を表示するカレンダーID（同僚のメールアドレスや会議室など）のリストを返す。"""
+    return list(_load_settings().get("freebusy") or [])
+
+
+def set_free_busy_calendars(calendar_ids):
+    """空き状況を表示するカレンダーIDを保存する。"""
+    settings = _load_settings()
+    settings["freebusy"] = list(calendar_ids)
+    _save_settings(settings)
 
-    start_of_day = datetime.datetime(
-        target_date.year, target_date.month, target_date.day,
-        tzinfo=cal_tz
+
+def list_calendars():
+    """calendarListからアカウントが参照できるカレンダーの一覧を返す。"""
+    service = _client.service()
+    calendars = []
+    params = {"fields": "nextPageToken,items(id,summary,summaryOverride,backgroundColor,primary)"}
+    while True:
+        result = _client.execute(service.calendarList().list(**params))
+        for item in result.get("items", []):
+            calendars.append({
+                # 設定上はプライマリを"primary"で扱う（アカウント変更後もそのまま使える）
+                "id": "primary" if item.get("primary") else item["id"],
+                "summary": item.get("summaryOverride") or item.get("summary", item["id"]),
+                "color": item.get("backgroundColor"),
+            })
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return calendars
+        params["pageToken"] = page_token
+
+
+def parse_event(item, calendar_id, cal_tz):
+    """APIのイベントリソースを、日時を解析済みのEventに変換する。"""
+    return Event.from_api(item, calendar_id, cal_tz)
+
+
+def _parse_items(items, calendar_id, cal_tz):
+    """1ページ分のイベントリソースをEventのリストに変換する。解析できないものは飛ばす。"""
+    events = []
+    with stats.span("api.parse", items=len(items)):
+        for item in items:
+            try:
+                events.append(parse_event(item, calendar_id, cal_tz))
+            except (KeyError, ValueError):
+                continue
+    return events
+
+
+def bucket_by_day(events, cal_tz, start_date, end_date):
+    """予定をstart_date以上end_date未満の日付ごとに振り分ける。日をまたぐ予定は各日に入る。"""
+    days = {}
+    d = start_date
+    while d < end_date:
+        days[d] = []
+        d += datetime.timedelta(days=1)
+
+    for event in events:
+        first, last = event.days(cal_tz)
+        d = max(first, start_date)
+        while d <= last and d < end_date:
+            days[d].append(event)
+            d += datetime.timedelta(days=1)
+    return days
+
+
+def iter_event_pages(service, if_none_match=None, **params):
+    """events().list をnextPageTokenに従って呼び出し、ページ（レスポンスdict）を順にyieldする。
+
+    if_none_matchを渡すと1ページ目を条件付きで要求し、変更がなければ304のHttpErrorになる。
+    """
+    params.setdefault("maxResults", EVENTS_PAGE_SIZE)
+    params.setdefault("fields", EVENT_LIST_FIELDS)
+    while True:
+        request = service.events().list(**params)
+        if if_none_match and "pageToken" not in params:
+            request.headers["If-None-Match"] = if_none_match
+        page = _client.execute(request)
+        yield page
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return
+        params["pageToken"] = page_token
+
+
+def _range_params(calendar_id, start_date, end_date, cal_tz, expand_recurring=False):
+    """期間指定でevents().listを呼ぶときのパラメータ。
+
+    expand_recurringなら繰り返し予定を展開させず、親予定と例外のまま受け取る。
+    """
+    range_start, range_end = _range_bounds(start_date, end_date, cal_tz)
+    params = {
+        "calendarId": calendar_id,
+        "timeMin": range_start.isoformat(),
+        "timeMax": range_end.isoformat(),
+        "timeZone": str(cal_tz),
+        "singleEvents": True,
+        "orderBy": "startTime",
+        "maxResults": EVENTS_PAGE_SIZE,
+        "fields": EVENT_LIST_FIELDS,
+    }
+    if expand_recurring:
+        # orderBy=startTimeはsingleEvents=Trueのときしか使えない（展開後に並べ替える）
+        del params["orderBy"]
+        params["singleEvents"] = False
+        params["fields"] = RECURRING_LIST_FIELDS
+    return params
+
+
+def _range_bounds(start_date, end_date, cal_tz):
+    """期間の始まりと終わりを、カレンダーのタイムゾーンの0:00として返す。"""
+    return (
+        datetime.datetime(start_date.year, start_date.month, start_date.day, tzinfo=cal_tz),
+        datetime.datetime(end_date.year, end_date.month, end_date.day, tzinfo=cal_tz),
     )
-    end_of_day = start_of_day + datetime.timedelta(days=1)
 
-    time_min = start_of_day.isoformat()
-    time_max = end_of_day.isoformat()
 
-    events_result = service.events().list(
-        calendarId="primary",
-        timeMin=time_min,
-        timeMax=time_max,
+def _expand_items(items, calendar_id, start_date, end_date, cal_tz):
+    """singleEvents=Falseで取得した全ページ分のリソースを、期間内の予定（開始時刻順）に展開する。"""
+    from recurrence import expand_items
+
+    moved = []
+    if any(item.get("recurrence") for item in items):
+        moved = _list_moved_exceptions(calendar_id, start_date, end_date, cal_tz)
+    range_start, range_end = _range_bounds(start_date, end_date, cal_tz)
+    with stats.span("api.expand", items=len(items)):
+        return expand_items(
+            items, calendar_id, cal_tz, range_start, range_end, memo=_recurrence_cache,
+            moved=moved,
+        )
+
+
+def _list_moved_exceptions(calendar_id, start_date, end_date, cal_tz):
+    """期間の前後RECURRENCE_MOVE_MARGIN_DAYS日にある例外（変更・キャンセルされた回）を返す。
+
+    元の時刻を知るためだけの問い合わせなので、項目は親予定のIDと元の開始時刻に絞る。
+    """
+    margin = datetime.timedelta(days=RECURRENCE_MOVE_MARGIN_DAYS)
+    range_start, range_end = _range_bounds(start_date - margin, end_date + margin, cal_tz)
+    pages = iter_event_pages(
+        _client.service(),
+        calendarId=calendar_id,
+        timeMin=range_start.isoformat(),
+        timeMax=range_end.isoformat(),
         timeZone=str(cal_tz),
-        singleEvents=True,
-        orderBy="startTime",
-    ).execute()
+        singleEvents=False,
+        fields=MOVED_EXCEPTION_FIELDS,
+    )
+    return [
+        item for page in pages for item in page.get("items", [])
+        if item.get("recurringEventId") and "originalStartTime" in item
+    ]
 
-    events = events_result.get("items", [])
 
-    parsed = []
-    for event in events:
-        start = event["start"].get("dateTime", event["start"].get("date"))
-        end = event["end"].get("dateTime", event["end"].get("date"))
+def iter_events_for_range(start_date, end_date, calendar_id="primary", expand_recurring=False):
+    """start_date以上end_date未満の予定をページ単位で取得し、(予定リスト, 続きがあるか) をyieldする。
+
+    expand_recurringなら繰り返し予定をローカルで展開する。例外の回が後のページに来ることが
+    あるため、この場合は全ページを受け取ってから1回だけyieldする。
+    """
+    service = _client.service()
+
+    # Googleカレンダーのタイムゾーンを使用（PCの時間ではなくカレンダー設定に従う）
+    cal_tz = get_timezone()
+
+    params = _range_params(calendar_id, start_date, end_date, cal_tz, expand_recurring)
+    if expand_recurring:
+        items = []
+        for page in iter_event_pages(service, **params):
+            items.extend(page.get("items", []))
+        yield _expand_items(items, calendar_id, start_date, end_date, cal_tz), False
+        return
+    for page in iter_event_pages(service, **params):
+        events = _parse_items(page.get("items", []), calendar_id, cal_tz)
+        yield events, bool(page.get("nextPageToken"))
+
+
+def _list_calendar_range(calendar_id, start_date, end_date, cal_tz, on_page=None,
+                         expand_recurring=False):
+    """1つのカレンダーの期間内の予定を全ページ取得し、(予定リスト, 変更なしか) を返す。
+
+    前回と同じ条件の取得ではETagをIf-None-Matchで送り、304なら前回の結果を返す。
+    ETagは1ページ目のものなので、2ページ目以降だけの変更は次の取得条件の変化まで反映されない。
+    on_pageには続きのページがある間、そこまでの予定リストを渡す（expand_recurringでは渡さない）。
+    """
+    from googleapiclient.errors import HttpError
+
+    service = _client.service()
+    params = _range_params(calendar_id, start_date, end_date, cal_tz, expand_recurring)
+    key = (calendar_id, params["timeMin"], params["timeMax"], params["timeZone"], expand_recurring)
+    cached = _etag_cache.get(key)
+
+    events = []
+    items = []
+    etag = None
+    try:
+        for page in iter_event_pages(service, if_none_match=cached and cached[0], **params):
+            if etag is None:
+                etag = page.get("etag")
+            if expand_recurring:
+                items.extend(page.get("items", []))
+                continue
+            events.extend(_parse_items(page.get("items", []), calendar_id, cal_tz))
+            if page.get("nextPageToken") and on_page is not None:
+                on_page(events)
+    except HttpError as e:
+        if e.resp.status == 304 and cached:
+            stats.cache("etag", True)
+            return cached[1], True
+        raise
+
+    if cached:
+        stats.cache("etag", False)
+
+    if expand_recurring:
+        events = _expand_items(items, calendar_id, start_date, end_date, cal_tz)
+    if etag:
+        _etag_cache.put(key, (etag, events))
+    return events, False
+
+
+def _batch_list_events(calendar_ids, start_date, end_date, cal_tz, expand_recurring=False):
+    """複数カレンダーの1ページ目をHTTPバッチで取得し、続きのページは個別に取得する。
+
+    バッチはBATCH_MAX_REQUESTS件ずつに分けて送る。
+    (カレンダーIDごとの予定リスト（それぞれ開始時刻順）のdict, 取得できなかったカレンダーID -> 例外)
+    を返す。すべてのカレンダーで失敗した場合は例外を送出する。
+    """
+    service = _client.service()
+    pages = {}
+    errors = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            pages[request_id] = response
+
+    for i in range(0, len(calendar_ids), BATCH_MAX_REQUESTS):
+        batch = _client.new_batch(on_response)
+        for calendar_id in calendar_ids[i:i + BATCH_MAX_REQUESTS]:
+            params = _range_params(calendar_id, start_date, end_date, cal_tz, expand_recurring)
+            batch.add(service.events().list(**params), request_id=calendar_id)
+        _client.execute(batch)
+
+    if errors and not pages:
+        raise next(iter(errors.values()))
+
+    results = {}
+    for calendar_id, page in pages.items():
+        items = list(page.get("items", []))
+        if page.get("nextPageToken"):
+            params = _range_params(calendar_id, start_date, end_date, cal_tz, expand_recurring)
+            params["pageToken"] = page["nextPageToken"]
+            try:
+                for more in iter_event_pages(service, **params):
+                    items.extend(more.get("items", []))
+            except Exception as e:
+                # 途中までの予定で埋めると「その日は空いている」ように見えるので失敗扱いにする
+                errors[calendar_id] = e
+                continue
+        if expand_recurring:
+            results[calendar_id] = _expand_items(items, calendar_id, start_date, end_date, cal_tz)
+        else:
+            results[calendar_id] = _parse_items(items, calendar_id, cal_tz)
+    return results, errors
+
 
-        all_day = "date" in event["start"]
+def get_events_for_range(start_date, end_date, on_page=None, calendar_ids=None,
+                         expand_recurring=False):
+    """start_date以上end_date未満の予定を取得し、日付ごとに振り分けて返す。
 
-        parsed.append({
-            "summary": event.get("summary", "(タイトルなし)"),
-            "start": start,
-            "end": end,
-            "location": event.get("location", ""),
-            "all_day": all_day,
-        })
+    戻り値の"days"は期間内の全日付をキーに持ち、予定がない日は空リストになる。
+    "not_modified"は前回の取得から変更がなかった（304だった）かどうか。
+    "failed"は取得できなかったカレンダーIDのリスト。空でなければ"days"は一部のカレンダーの
+    予定しか含まないので、キャッシュに保存してはいけない。
+    calendar_idsを省略すると設定で選んだカレンダーが対象になる。複数の場合は
+    HTTPバッチでまとめて取得し、開始時刻順に1本に統合する（各予定の"calendar_id"で区別）。
+    単一カレンダーでon_pageを渡すと、続きのページがある間は途中結果を同じ形で渡す。
+    expand_recurringなら繰り返し予定をサーバーで展開させず、親予定と例外だけを受け取って
+    ローカルで展開する（期間が長いほど転送量が減る）。
+    """
+    started = time.perf_counter()
+    cal_tz = get_timezone()
+    if calendar_ids is None:
+        calendar_ids = get_selected_calendars()
 
-    return {"events": parsed, "timezone": str(cal_tz)}
+    not_modified = False
+    failed = []
+    if len(calendar_ids) == 1:
+        def on_partial(events):
+            on_page({
+                "days": bucket_by_day(events, cal_tz, start_date, end_date),
+                "timezone": str(cal_tz),
+            })
+
+        events, not_modified = _list_calendar_range(
+            calendar_ids[0], start_date, end_date, cal_tz,
+            on_page=on_partial if on_page is not None else None,
+            expand_recurring=expand_recurring,
+        )
+    else:
+        per_calendar, errors = _batch_list_events(
+            calendar_ids, start_date, end_date, cal_tz, expand_recurring
+        )
+        failed = [c for c in calendar_ids if c in errors]
+        if failed:
+            stats.incr("fetch.partial")
+        events = list(heapq.merge(
+            *per_calendar.values(), key=Event.sort_key
+        ))
+
+    with stats.span("bucket", events=len(events)):
+        days = bucket_by_day(events, cal_tz, start_date, end_date)
+
+    elapsed = time.perf_counter() - started
+    stats.record(
+        "fetch.range", elapsed * 1000, days=(end_date - start_date).days,
+        calendars=len(calendar_ids), events=len(events), not_modified=not_modified,
+    )
+    return {"days": days, "timezone": str(cal_tz), "not_modified": not_modified, "failed": failed}
+
+
+def get_events_for_date(target_date=None):
+    """指定日の予定を取得して返す。target_dateはdatetime.dateオブジェクト。"""
+    if target_date is None:
+        target_date = datetime.datetime.now(get_timezone()).date()
+
+    result = get_events_for_range(target_date, target_date + datetime.timedelta(days=1))
+    return {"events": result["days"][target_date], "timezone": result["timezone"]}
+
+
+def merge_intervals(intervals):
+    """(開始, 終了) のリストを、重なり・接するものをまとめた開始時刻順のリストにする。"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def query_free_busy(start_date, end_date, calendar_ids):
+    """freebusy().queryで複数カレンダーの予定が入っている時間帯を取得する。
+
+    予定の内容は取得しないので、events().listをカレンダーの数だけ呼ぶより大幅に軽い。
+    カレンダーは1リクエストあたりFREEBUSY_MAX_CALENDARS件ずつまとめて問い合わせる。
+    戻り値の"busy"は全カレンダーを統合した (開始, 終了) のリスト、"calendars"は
+    カレンダーごとのリスト、"errors"は取得できなかったカレンダーとその理由。
+    """
+    service = _client.service()
+    cal_tz = get_timezone()
+    range_start, range_end = _range_bounds(start_date, end_date, cal_tz)
+    calendars = {}
+    errors = {}
+    for i in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS):
+        body = {
+            "timeMin": range_start.isoformat(),
+            "timeMax": range_end.isoformat(),
+            "timeZone": str(cal_tz),
+            "items": [{"id": cid} for cid in calendar_ids[i:i + FREEBUSY_MAX_CALENDARS]],
+        }
+        result = _client.execute(service.freebusy().query(body=body, fields="calendars"))
+        for calendar_id, entry in result.get("calendars", {}).items():
+            if entry.get("errors"):
+                errors[calendar_id] = entry["errors"][0].get("reason", "unknown")
+                continue
+            calendars[calendar_id] = [
+                (
+                    datetime.datetime.fromisoformat(b["start"]).astimezone(cal_tz),
+                    datetime.datetime.fromisoformat(b["end"]).astimezone(cal_tz),
+                )
+                for b in entry.get("busy", [])
+            ]
+    busy = merge_intervals(b for intervals in calendars.values() for b in intervals)
+    return {"busy": busy, "calendars": calendars, "errors": errors, "timezone": str(cal_tz)}
+
+
+def get_event_detail(event_id, calendar_id="primary"):
+    """予定の完全な情報（説明・参加者・会議URLなど）を返す。一度取得したものはLRUから返す。"""
+    key = (calendar_id, event_id)
+    detail = _detail_cache.get(key)
+    stats.cache("event_detail", detail is not None)
+    if detail is None:
+        service = _client.service()
+        detail = _client.execute(
+            service.events().get(calendarId=calendar_id, eventId=event_id)
+        )
+        _detail_cache.put(key, detail)
+    return detail
@@ -0,0 +1,115 @@
+"""GUIなしで予定を書き出すコマンドラインモード。
+
+    python main.py --date 2026-10-20 --days 90 --format jsonl
+    python main.py --days 7 --format csv --calendar primary --calendar team@example.com > week.csv
+
+期間全体を1回の問い合わせ（必要な分だけのページ）で取得し、ページが届くたびに
+書き出すので、長い期間でもメモリに溜め込まない。複数カレンダーを指定した場合は
+カレンダーごとに順に書き出す（各カレンダー内は開始時刻順）。
+"""
+import os
+import sys
+import csv
+import json
+import argparse
+import datetime
+
+FORMATS = ("jsonl", "csv")
+CSV_FIELDS = ("calendar_id", "id", "summary", "location", "all_day", "start", "end")
+
+
+class JsonLinesWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, event):
+        self.out.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    def __init__(self, out):
+        self._writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, lineterminator="\n")
+        self._writer.writeheader()
+
+    def write(self, event):
+        self._writer.writerow(event.to_dict())
+
+
+def export_events(start_date, days, out, fmt="jsonl", calendar_ids=None, expand_recurring=False):
+    """start_dateからdays日分の予定をoutに書き出し、書き出した件数を返す。
+
+    expand_recurringなら繰り返し予定をローカルで展開する（カレンダーごとに全ページを受け取ってから書き出す）。
+    """
+    from calendar_api import get_selected_calendars, iter_events_for_range
+
+    end_date = start_date + datetime.timedelta(days=days)
+    writer = CsvWriter(out) if fmt == "csv" else JsonLinesWriter(out)
+    count = 0
+    for calendar_id in calendar_ids or get_selected_calendars():
+        pages = iter_events_for_range(start_date, end_date, calendar_id, expand_recurring)
+        for events, _more in pages:
+            for event in events:
+                writer.write(event)
+            count += len(events)
+            # 受け取り側（パイプの先）がページ単位で処理を始められるようにする
+            out.flush()
+    return count
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日付は YYYY-MM-DD で指定してください: {value}")
+
+
+def _positive_int(value):
+    days = int(value)
+    if days < 1:
+        raise argparse.ArgumentTypeError("日数は1以上で指定してください")
+    return days
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="予定を標準出力に書き出す（オプションを付けずに起動するとウィジェットを表示する）。",
+    )
+    parser.add_argument("--date", type=_parse_date, default=None,
+                        help="開始日（YYYY-MM-DD）。省略時はカレンダーのタイムゾーンでの今日")
+    parser.add_argument("--days", type=_positive_int, default=1, help="書き出す日数（既定: 1）")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="出力形式（既定: jsonl）")
+    parser.add_argument("--calendar", action="append", dest="calendars", metavar="ID",
+                        help="対象のカレンダーID（複数指定可）。省略時は設定で選んだカレンダー")
+    parser.add_argument("--expand-recurring", action="store_true",
+                        help="繰り返し予定をローカルで展開する（実験的。長い期間で転送量が減るが、"
+                             "期間の前後31日より遠くへ移動された回は元の時刻にも出ることがある）")
+    return parser
+
+
+def main(argv):
+    args = build_parser().parse_args(argv)
+
+    from calendar_api import get_timezone, is_logged_in
+
+    if not is_logged_in():
+        print("ログインしていません。先にウィジェットを起動してログインしてください。", file=sys.stderr)
+        return 2
+
+    # 書き出す内容は機械向けなので、コンソールの文字コードによらずUTF-8にする
+    sys.stdout.reconfigure(encoding="utf-8")
+    out = sys.stdout
+    try:
+        start_date = args.date or datetime.datetime.now(get_timezone()).date()
+        export_events(
+            start_date, args.days, out, args.format, args.calendars, args.expand_recurring
+        )
+    except BrokenPipeError:
+        # headなどで途中で読み終えられた場合は正常終了扱い。終了時のflushで再び失敗しないようにする
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except Exception as e:
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+    return 0
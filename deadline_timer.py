@@ -0,0 +1,33 @@
+import math
+
+
+class DeadlineTimer:
+    """指定した時刻にだけコールバックを呼ぶ、root.afterの1回限りのタイマー。
+
+    掛け直すと前のタイマーは取り消す。定期的なポーリングはしない。
+    """
+
+    # スリープ復帰などでafterが大きく遅れても取りこぼさないよう、待ち時間に上限を設ける
+    MAX_WAIT_MS = 60 * 60 * 1000
+
+    def __init__(self, root, now):
+        self.root = root
+        self._now = now
+        self._timer = None
+        self._callback = None
+
+    def arm(self, deadline, callback):
+        """deadlineにcallback()を呼ぶよう掛け直す。上限を超える待ちは途中で一度呼ぶ。"""
+        self.cancel()
+        delay_ms = math.ceil((deadline - self._now()).total_seconds() * 1000)
+        self._callback = callback
+        self._timer = self.root.after(min(max(0, delay_ms), self.MAX_WAIT_MS), self._fire)
+
+    def cancel(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def _fire(self):
+        self._timer = None
+        self._callback()
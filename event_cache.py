@@ -0,0 +1,78 @@
+import os
+import json
+import sqlite3
+import threading
+from calendar_api import BASE_DIR
+from event_model import Event
+
+EVENT_CACHE_PATH = os.path.join(BASE_DIR, "event_cache.db")
+
+
+class EventCache:
+    """取得した予定を日付・カレンダーごとにSQLiteへ保存するディスクキャッシュ。
+
+    起動直後やオフライン時に、ネットワークを待たずに前回の予定を表示するために使う。
+    """
+
+    def __init__(self, path=EVENT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS day_events ("
+                " day TEXT NOT NULL,"
+                " calendar_id TEXT NOT NULL,"
+                " events TEXT NOT NULL,"
+                " timezone TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (day, calendar_id))"
+            )
+
+    def save_days(self, days, tz_name, fetched_at, calendar_id="primary"):
+        """date -> 予定リストのdictを保存する。"""
+        rows = [
+            (
+                day.isoformat(),
+                calendar_id,
+                json.dumps([e.to_dict() for e in events], ensure_ascii=False),
+                tz_name,
+                fetched_at,
+            )
+            for day, events in days.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO day_events VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def load_day(self, day, calendar_id="primary"):
+        """保存済みの (予定リスト, タイムゾーン名, 取得時刻) を返す。なければNone。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT events, timezone, fetched_at FROM day_events"
+                " WHERE day = ? AND calendar_id = ?",
+                (day.isoformat(), calendar_id),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            events = [Event.from_dict(d) for d in json.loads(row[0])]
+        except (ValueError, KeyError):
+            return None
+        return events, row[1], row[2]
+
+    def prune(self, before_day, calendar_id=None):
+        """before_dayより前の日を削除する。calendar_idを渡すと、それ以外のカレンダーの行も削除する。"""
+        with self._lock, self._conn:
+            if calendar_id is None:
+                self._conn.execute("DELETE FROM day_events WHERE day < ?", (before_day.isoformat(),))
+            else:
+                self._conn.execute(
+                    "DELETE FROM day_events WHERE day < ? OR calendar_id != ?",
+                    (before_day.isoformat(), calendar_id),
+                )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM day_events")
@@ -0,0 +1,175 @@
+import tkinter as tk
+
+
+class EventCard:
+    """1件の予定を表示するカードのウィジェット一式。作成後は使い回し、表示内容だけ更新する。"""
+
+    def __init__(self, parent, theme, on_click):
+        self.theme = theme
+        self.event = None
+        self._state = None
+
+        self.outer = tk.Frame(parent, bg=theme.BG_COLOR)
+        self.card = tk.Frame(self.outer, bg=theme.BG_COLOR)
+        self.card.pack(fill=tk.X, padx=6, pady=2)
+        self.bar = tk.Frame(self.card, bg=theme.ACCENT_COLOR, width=3)
+        self.bar.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 8), pady=4)
+        self.content = tk.Frame(self.card, bg=theme.BG_COLOR)
+        self.content.pack(side=tk.LEFT, fill=tk.X, expand=True, pady=4)
+        self.time_label = tk.Label(self.content, font=("Segoe UI", 8), anchor="w")
+        self.time_label.pack(anchor="w")
+        self.title_label = tk.Label(
+            self.content, anchor="w", wraplength=theme.width - 40, justify=tk.LEFT,
+        )
+        self.title_label.pack(anchor="w")
+        self.location_label = tk.Label(
+            self.content, fg=theme.LOCATION_COLOR, font=("Segoe UI", 8), anchor="w",
+            wraplength=theme.width - 40, justify=tk.LEFT,
+        )
+        tk.Frame(self.outer, bg=theme.BORDER_COLOR, height=1).pack(fill=tk.X, padx=10)
+
+        for widget in (self.card, self.bar, self.content,
+                       self.time_label, self.title_label, self.location_label):
+            widget.bind("<Button-1>", lambda e: self._on_click(on_click))
+
+    def _on_click(self, on_click):
+        if self.event is not None and self.event.id:
+            on_click(self.event)
+
+    def render(self, event, is_current, is_conflict=False):
+        """表示内容が変わったときだけウィジェットを更新する。更新したらTrue。
+
+        is_conflictなら他の予定と時間が重なっていることを示す。
+        """
+        self.event = event
+        if event.all_day:
+            time_str = "終日"
+        else:
+            time_str = f"{event.start.strftime('%H:%M')} - {event.end.strftime('%H:%M')}"
+        if is_conflict:
+            time_str += "  \u26a0 重複"
+        state = (
+            time_str, event.summary, event.location, event.all_day, is_current, is_conflict,
+            bool(event.id),
+        )
+        if state == self._state:
+            return False
+        self._state = state
+
+        t = self.theme
+        bg = t.CURRENT_BG if is_current else t.BG_COLOR
+        cursor = "hand2" if event.id else ""
+        for widget in (self.card, self.content):
+            widget.configure(bg=bg, cursor=cursor)
+        if is_current:
+            bar_color = t.CURRENT_FG
+        elif is_conflict:
+            bar_color = t.CONFLICT_COLOR
+        else:
+            bar_color = t.ACCENT_COLOR
+        self.bar.configure(bg=bar_color, cursor=cursor)
+        self.time_label.configure(
+            text=time_str,
+            bg=t.ALLDAY_BG if event.all_day else bg,
+            fg=t.FG_COLOR if event.all_day else (t.CONFLICT_COLOR if is_conflict else t.TIME_COLOR),
+            padx=2 if event.all_day else 0, cursor=cursor,
+        )
+        self.title_label.configure(
+            text=event.summary, bg=bg, fg=t.CURRENT_FG if is_current else t.FG_COLOR,
+            font=("Segoe UI", 10, "bold") if is_current else ("Segoe UI", 10),
+            cursor=cursor,
+        )
+        if event.location:
+            self.location_label.configure(
+                text=f"\U0001f4cd {event.location}", bg=bg, cursor=cursor,
+            )
+            self.location_label.pack(anchor="w")
+        else:
+            self.location_label.pack_forget()
+        return True
+
+
+class EventListView:
+    """予定カードをEvent.keyで管理し、前回表示との差分だけを画面に反映する。
+
+    不要になったカードは破棄せずプールに戻し、次に必要になったときに再利用する。
+    """
+
+    def __init__(self, parent, theme, on_click):
+        self.parent = parent
+        self.theme = theme
+        self.on_click = on_click
+        self._cards = {}   # Event.key -> 表示中のEventCard
+        self._order = []   # 表示中のEvent.keyの並び
+        self._pool = []    # 非表示で待機しているEventCard
+        self._message = None
+        self._message_text = None
+
+    def render(self, events, current_keys, conflict_keys=frozenset()):
+        """予定リストを表示する。current_keysは進行中、conflict_keysは他の予定と重なっている予定のEvent.key集合。
+
+        画面に変化があったらTrueを返す（変化がなければウィジェットには一切触れない）。
+        """
+        changed = self._set_message(None)
+        return self._sync_cards(events, current_keys, conflict_keys) or changed
+
+    def show_message(self, text):
+        """カードをすべて隠してメッセージを表示する。変化があればTrue。"""
+        changed = self._sync_cards([], set())
+        return self._set_message(text) or changed
+
+    def _sync_cards(self, events, current_keys, conflict_keys=frozenset()):
+        changed = False
+        keys = [e.key for e in events]
+        key_set = set(keys)
+
+        for key in [k for k in self._order if k not in key_set]:
+            card = self._cards.pop(key)
+            card.outer.pack_forget()
+            self._pool.append(card)
+            changed = True
+
+        for event in events:
+            card = self._cards.get(event.key)
+            if card is None:
+                card = self._pool.pop() if self._pool else EventCard(
+                    self.parent, self.theme, self.on_click
+                )
+                self._cards[event.key] = card
+            if card.render(event, event.key in current_keys, event.key in conflict_keys):
+                changed = True
+
+        if keys != self._order:
+            # 並びが変わったときだけ詰め直す
+            for key in self._order:
+                if key in self._cards:
+                    self._cards[key].outer.pack_forget()
+            for key in keys:
+                self._cards[key].outer.pack(fill=tk.X)
+            self._order = keys
+            changed = True
+        return changed
+
+    def _set_message(self, text):
+        if text == self._message_text:
+            return False
+        self._message_text = text
+        if text is None:
+            self._message.pack_forget()
+            return True
+        if self._message is None:
+            self._message = tk.Label(
+                self.parent, bg=self.theme.BG_COLOR, fg=self.theme.TIME_COLOR,
+                font=("Segoe UI", 10), pady=20,
+            )
+        self._message.configure(text=text)
+        self._message.pack(fill=tk.X)
+        return True
+
+    def forget(self):
+        """親フレームの子が破棄されたときに呼び、保持しているカードをすべて捨てる。"""
+        self._cards.clear()
+        self._order = []
+        self._pool.clear()
+        self._message = None
+        self._message_text = None
@@ -0,0 +1,45 @@
+import bisect
+import datetime
+
+from deadline_timer import DeadlineTimer
+
+
+class EventClock:
+    """表示中の予定が始まる・終わる瞬間にだけ表示の更新を呼び出す。
+
+    時刻指定の予定の開始時刻と終了時刻をそれぞれ整列した配列で持ち、bisectで
+    現在時刻の次の境目を求めてタイマーを1つだけ掛ける。境目では「終了済みの
+    予定を隠す」「進行中の予定を強調する」の判定が変わるのでon_change()を呼ぶ。
+    日付の変わり目（「今日」の判定が変わる）も境目に含める。
+    """
+
+    def __init__(self, root, now, on_change):
+        self.root = root
+        self._now = now
+        self._on_change = on_change
+        self._starts = []
+        self._ends = []
+        self._timer = DeadlineTimer(root, now)
+
+    def set_events(self, events):
+        timed = [e for e in events if not e.all_day]
+        self._starts = sorted(e.start for e in timed)
+        self._ends = sorted(e.end for e in timed)
+        self._schedule()
+
+    def next_change(self, now):
+        """nowより後で、予定の開始・終了・日付の変わり目のうち最も早い時刻。"""
+        tomorrow = now.date() + datetime.timedelta(days=1)
+        moment = datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=now.tzinfo)
+        for times in (self._starts, self._ends):
+            i = bisect.bisect_right(times, now)
+            if i < len(times) and times[i] < moment:
+                moment = times[i]
+        return moment
+
+    def _schedule(self):
+        self._timer.arm(self.next_change(self._now()), self._tick)
+
+    def _tick(self):
+        self._on_change()
+        self._schedule()
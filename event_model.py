@@ -0,0 +1,94 @@
+import datetime
+
+
+class Event:
+    """取得時に一度だけ解析した予定。start/endはカレンダーのタイムゾーン付きdatetime。
+
+    終日予定のstart/endはその日の0:00（endは翌日0:00、排他的）。
+    """
+
+    __slots__ = ("id", "calendar_id", "summary", "location", "all_day", "start", "end")
+
+    def __init__(self, id, calendar_id, summary, location, all_day, start, end):
+        self.id = id
+        self.calendar_id = calendar_id
+        self.summary = summary
+        self.location = location
+        self.all_day = all_day
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_api(cls, item, calendar_id, cal_tz):
+        """APIのイベントリソースから作る。"""
+        all_day = "date" in item["start"]
+        if all_day:
+            start = _midnight(datetime.date.fromisoformat(item["start"]["date"]), cal_tz)
+            end = _midnight(datetime.date.fromisoformat(item["end"]["date"]), cal_tz)
+        else:
+            start = _aware(item["start"]["dateTime"], cal_tz)
+            end = _aware(item["end"]["dateTime"], cal_tz)
+        return cls(
+            item.get("id", ""),
+            calendar_id,
+            item.get("summary", "(タイトルなし)"),
+            item.get("location", ""),
+            all_day,
+            start,
+            end,
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """to_dict()の結果から復元する。"""
+        return cls(
+            data["id"],
+            data["calendar_id"],
+            data["summary"],
+            data["location"],
+            data["all_day"],
+            datetime.datetime.fromisoformat(data["start"]),
+            datetime.datetime.fromisoformat(data["end"]),
+        )
+
+    def to_dict(self):
+        """JSONに保存できるdictを返す。"""
+        return {
+            "id": self.id,
+            "calendar_id": self.calendar_id,
+            "summary": self.summary,
+            "location": self.location,
+            "all_day": self.all_day,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+        }
+
+    @property
+    def key(self):
+        """カレンダーをまたいでも一意な予定の識別子。"""
+        return f"{self.calendar_id}/{self.id}"
+
+    def sort_key(self):
+        """開始時刻順に並べるためのキー。同時刻なら終日予定が先。"""
+        return (self.start, 0 if self.all_day else 1)
+
+    def days(self, cal_tz):
+        """予定が掛かるカレンダータイムゾーン上の (最初の日, 最後の日) を返す。"""
+        first = self.start.astimezone(cal_tz).date()
+        # 終了時刻ちょうど0:00の予定は翌日に含めない
+        last = (self.end.astimezone(cal_tz) - datetime.timedelta(microseconds=1)).date()
+        return first, max(first, last)
+
+    def __repr__(self):
+        return f"Event({self.key!r}, {self.summary!r}, {self.start.isoformat()})"
+
+
+def _midnight(day, tz):
+    return datetime.datetime(day.year, day.month, day.day, tzinfo=tz)
+
+
+def _aware(value, tz):
+    dt = datetime.datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=tz)
+    return dt.astimezone(tz)
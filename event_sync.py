@@ -0,0 +1,195 @@
+import time
+import datetime
+import threading
+from calendar_api import bucket_by_day, get_client, get_timezone, iter_event_pages, parse_event
+from event_model import Event
+from perf_stats import stats
+
+
+class EventSyncStore:
+    """syncTokenを使って差分だけを取得し、ローカルに予定を保持するストア。
+
+    初回（または410 Gone後）は期間を指定して全件取得し、以降は前回の
+    nextSyncTokenで変更分（キャンセルを含む）だけを受け取って反映する。
+    日付が進んで同期期間がずれたときは、syncTokenを保ったまま新たに期間に入った
+    日だけを取得し、期間から外れた予定を捨てる。
+
+    初回の全件取得は表示より時間がかかるので、ウィジェットは表示中の期間を
+    get_events_for_rangeで先に取得し、is_ready()になるまで同期は裏で行う。
+    """
+
+    def __init__(self, calendar_id="primary", past_days=14, future_days=60):
+        self.calendar_id = calendar_id
+        self.past_days = past_days
+        self.future_days = future_days
+        self.timezone = None
+        self._lock = threading.Lock()
+        self._events = {}  # id -> 予定dict
+        self._sync_token = None
+        self._window = None  # (start_date, end_date) 全件取得した期間
+        self.last_sync = None  # time.time()
+        self.last_sync_incremental = False  # 直前のsync()が差分同期だったか（全件取得ならFalse）
+
+    def is_ready(self):
+        """全件取得が済み、差分同期できる状態か。"""
+        with self._lock:
+            return self._sync_token is not None
+
+    def covers(self, start_date, end_date):
+        """[start_date, end_date) が同期対象の期間内かどうか。"""
+        window = self._window or self._default_window()
+        return window[0] <= start_date and end_date <= window[1]
+
+    def _default_window(self):
+        today = datetime.date.today()
+        return (
+            today - datetime.timedelta(days=self.past_days),
+            today + datetime.timedelta(days=self.future_days),
+        )
+
+    def reset(self, calendar_id=None):
+        """保持している予定とsyncTokenを破棄する。次回は全件取得になる。"""
+        with self._lock:
+            if calendar_id is not None:
+                self.calendar_id = calendar_id
+            self._events.clear()
+            self._sync_token = None
+            self._window = None
+            self.timezone = None
+            self.last_sync = None
+            self.last_sync_incremental = False
+
+    def _list_all(self, service, **params):
+        """全ページを取得し、(items, nextSyncToken) を返す。nextSyncTokenは最終ページにだけ付く。"""
+        items = []
+        page = {}
+        for page in iter_event_pages(service, **params):
+            items.extend(page.get("items", []))
+        return items, page.get("nextSyncToken")
+
+    def _full_sync(self, service, cal_tz):
+        start_date, end_date = self._default_window()
+        range_start = datetime.datetime(
+            start_date.year, start_date.month, start_date.day, tzinfo=cal_tz
+        )
+        range_end = datetime.datetime(
+            end_date.year, end_date.month, end_date.day, tzinfo=cal_tz
+        )
+        items, token = self._list_all(
+            service,
+            calendarId=self.calendar_id,
+            timeMin=range_start.isoformat(),
+            timeMax=range_end.isoformat(),
+            timeZone=str(cal_tz),
+            singleEvents=True,
+        )
+        self._events = {}
+        for item in items:
+            if item.get("status") != "cancelled":
+                self._store(item, cal_tz)
+        self._sync_token = token
+        self._window = (start_date, end_date)
+        return len(items)
+
+    def _slide_window(self, service, cal_tz, window):
+        """同期期間をwindowへずらす。新たに期間に入った日だけを取得し、外れた予定は捨てる。
+
+        期間が前に戻った（時計の変更など）か、ずれが大きすぎる場合はFalseを返す（全件取得が必要）。
+        """
+        old_start, old_end = self._window
+        start_date, end_date = window
+        if start_date < old_start or end_date < old_end or start_date >= old_end:
+            return False, 0
+        changed = 0
+        if end_date > old_end:
+            items, _ = self._list_all(
+                service,
+                calendarId=self.calendar_id,
+                timeMin=datetime.datetime(old_end.year, old_end.month, old_end.day, tzinfo=cal_tz).isoformat(),
+                timeMax=datetime.datetime(end_date.year, end_date.month, end_date.day, tzinfo=cal_tz).isoformat(),
+                timeZone=str(cal_tz),
+                singleEvents=True,
+            )
+            for item in items:
+                if item.get("status") != "cancelled":
+                    self._store(item, cal_tz)
+            changed += len(items)
+        range_start = datetime.datetime(start_date.year, start_date.month, start_date.day, tzinfo=cal_tz)
+        for event_id in [i for i, e in self._events.items() if e.end <= range_start]:
+            del self._events[event_id]
+        self._window = window
+        return True, changed
+
+    def _store(self, item, cal_tz):
+        try:
+            self._events[item["id"]] = parse_event(item, self.calendar_id, cal_tz)
+        except (KeyError, ValueError):
+            pass
+
+    def _incremental_sync(self, service, cal_tz):
+        items, token = self._list_all(
+            service,
+            calendarId=self.calendar_id,
+            syncToken=self._sync_token,
+            timeZone=str(cal_tz),
+            singleEvents=True,
+        )
+        for item in items:
+            if item.get("status") == "cancelled":
+                self._events.pop(item["id"], None)
+            else:
+                self._store(item, cal_tz)
+        self._sync_token = token
+        return len(items)
+
+    def sync(self):
+        """サーバーと同期し、変更された予定の件数を返す。
+
+        全件取得では予定が0件でも「変更なし」ではないので、差分同期だったかは
+        last_sync_incrementalで確かめる。
+        """
+        from googleapiclient.errors import HttpError
+
+        with self._lock:
+            service = get_client().service()
+            cal_tz = get_timezone()
+            if self.timezone is not None and self.timezone != str(cal_tz):
+                self._sync_token = None  # タイムゾーンが変わったら全件取り直す
+            self.timezone = str(cal_tz)
+
+            self.last_sync_incremental = False
+            window = self._default_window()
+            slid = 0
+            if self._sync_token is not None and self._window != window:
+                with stats.span("sync.slide"):
+                    ok, slid = self._slide_window(service, cal_tz, window)
+                if not ok:
+                    self._sync_token = None
+            if self._sync_token is None:
+                with stats.span("sync.full"):
+                    changed = self._full_sync(service, cal_tz)
+            else:
+                try:
+                    with stats.span("sync.incremental"):
+                        changed = self._incremental_sync(service, cal_tz) + slid
+                    self.last_sync_incremental = True
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    # syncTokenが失効した（410 Gone）ので全件取り直す
+                    stats.incr("sync.expired")
+                    with stats.span("sync.full"):
+                        changed = self._full_sync(service, cal_tz)
+            self.last_sync = time.time()
+            return changed
+
+    def events_for_range(self, start_date, end_date):
+        """保持している予定を日付ごとに振り分けて、get_events_for_rangeと同じ形で返す。"""
+        with self._lock:
+            cal_tz = get_timezone()
+            events = sorted(self._events.values(), key=Event.sort_key)
+            return {
+                "days": bucket_by_day(events, cal_tz, start_date, end_date),
+                "timezone": str(cal_tz),
+            }
+
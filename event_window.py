@@ -0,0 +1,78 @@
+import time
+import datetime
+from interval_index import IntervalIndex
+
+
+class EventWindowCache:
+    """表示日周辺の予定を日付ごとに保持するキャッシュ。
+
+    日付ナビゲーションではキャッシュから即座に表示し、前後の日は
+    バックグラウンドでまとめて先読みする。表示日から離れた日は破棄する。
+    """
+
+    def __init__(self, prefetch_days=3, keep_days=14, ttl=300):
+        self.prefetch_days = prefetch_days  # 表示日の前後に先読みする日数
+        self.keep_days = keep_days          # 表示日からこの日数より離れた日は破棄
+        self.ttl = ttl                      # 秒。これより古い日は再取得の対象
+        self.timezone = None
+        self._days = {}  # date -> (events, fetched_at)
+        self._index = None  # キャッシュ全体のIntervalIndex（内容が変わったら作り直す）
+
+    def get(self, day):
+        """キャッシュ済みの予定リストを返す。なければNone。"""
+        entry = self._days.get(day)
+        return entry[0] if entry else None
+
+    def is_fresh(self, day):
+        entry = self._days.get(day)
+        return entry is not None and time.monotonic() - entry[1] < self.ttl
+
+    def put_days(self, days, tz_name):
+        """get_events_for_rangeの結果（date -> 予定リスト）を取り込む。"""
+        now = time.monotonic()
+        for day, events in days.items():
+            self._days[day] = (events, now)
+        self._index = None
+        if tz_name:
+            self.timezone = tz_name
+
+    def window(self, center):
+        """centerを中心とした先読み範囲 [start, end) を返す。"""
+        start = center - datetime.timedelta(days=self.prefetch_days)
+        end = center + datetime.timedelta(days=self.prefetch_days + 1)
+        return start, end
+
+    def missing_range(self, center, force=False):
+        """先読み範囲のうち取得が必要な日を含む最小の [start, end) を返す。不要ならNone。"""
+        start, end = self.window(center)
+        stale = []
+        d = start
+        while d < end:
+            if force or not self.is_fresh(d):
+                stale.append(d)
+            d += datetime.timedelta(days=1)
+        if not stale:
+            return None
+        return stale[0], stale[-1] + datetime.timedelta(days=1)
+
+    def evict(self, center):
+        """centerから離れすぎた日を破棄する。"""
+        limit = datetime.timedelta(days=self.keep_days)
+        for day in [d for d in self._days if abs(d - center) > limit]:
+            del self._days[day]
+            self._index = None
+
+    def index(self):
+        """キャッシュ済みの全日程の予定のIntervalIndex。日をまたぐ予定は1件として入れる。"""
+        if self._index is None:
+            events = {}
+            for day_events, _ in self._days.values():
+                for event in day_events:
+                    events[event.key] = event
+            self._index = IntervalIndex(events.values())
+        return self._index
+
+    def clear(self):
+        self._days.clear()
+        self._index = None
+        self.timezone = None
@@ -0,0 +1,69 @@
+import datetime
+import tkinter as tk
+
+
+class FreeBusyStrip:
+    """1日分の空き状況を横長の帯で表示する。予定が入っている時間帯を塗りつぶす。
+
+    表示するのは統合済みのbusy区間だけなので、描画するアイテムは区間の数+目盛りで済む。
+    """
+
+    HEIGHT = 26
+    FIRST_HOUR = 6   # 帯の左端
+    LAST_HOUR = 22   # 帯の右端
+    BUSY_COLOR = "#f38ba8"
+    MARGIN = 10
+
+    def __init__(self, parent, theme):
+        self.theme = theme
+        self.frame = tk.Frame(parent, bg=theme.BG_COLOR)
+        self.canvas = tk.Canvas(
+            self.frame, bg=theme.BG_COLOR, highlightthickness=0,
+            width=theme.width, height=self.HEIGHT,
+        )
+        self.canvas.pack(fill=tk.X)
+        tk.Frame(self.frame, bg=theme.BORDER_COLOR, height=1).pack(fill=tk.X)
+        self._state = None
+
+    def show(self, day, tz, busy, now=None, message=None):
+        """dayのbusy区間 [(開始, 終了)] を描く。nowがその日の中なら現在位置に線を引く。
+
+        表示内容が前回と同じなら描き直さない。
+        """
+        if now is not None and now.date() != day:
+            now = None
+        state = (day, str(tz), tuple(busy), now and now.replace(second=0, microsecond=0), message)
+        if state == self._state:
+            return
+        self._state = state
+
+        t = self.theme
+        c = self.canvas
+        c.delete("all")
+        left = self.MARGIN
+        right = t.width - self.MARGIN
+        top, bottom = 12, self.HEIGHT - 4
+        day_start = datetime.datetime(day.year, day.month, day.day, self.FIRST_HOUR, tzinfo=tz)
+        span = (self.LAST_HOUR - self.FIRST_HOUR) * 3600
+
+        def x_of(moment):
+            seconds = (moment - day_start).total_seconds()
+            return left + (right - left) * min(max(seconds / span, 0), 1)
+
+        c.create_rectangle(left, top, right, bottom, fill=t.HEADER_BG, width=0)
+        for start, end in busy:
+            x0, x1 = x_of(start), x_of(end)
+            if x1 > x0:
+                c.create_rectangle(x0, top, max(x1, x0 + 1), bottom, fill=self.BUSY_COLOR, width=0)
+        for hour in range(self.FIRST_HOUR, self.LAST_HOUR + 1, 3):
+            x = x_of(day_start + datetime.timedelta(hours=hour - self.FIRST_HOUR))
+            c.create_line(x, top - 2, x, top, fill=t.TIME_COLOR)
+            c.create_text(x, top - 2, text=str(hour), anchor="s", fill=t.TIME_COLOR, font=("Segoe UI", 6))
+        if now is not None:
+            x = x_of(now)
+            c.create_line(x, top - 1, x, bottom + 1, fill=t.CURRENT_FG, width=2)
+        if message:
+            c.create_text(
+                (left + right) / 2, (top + bottom) / 2, text=message,
+                fill=t.FG_COLOR, font=("Segoe UI", 7),
+            )
@@ -0,0 +1,162 @@
+import bisect
+from collections import Counter
+
+
+class IntervalIndex:
+    """時刻指定の予定を開始時刻順に並べ、区間の重なりを対数時間で調べる索引。
+
+    開始時刻順の配列を暗黙の二分木とみなし、各部分木の終了時刻の最大値を
+    持たせる（拡張区間木）。「時刻tに進行中の予定」「ある期間に重なる予定」は
+    O(log n + 該当件数)、「次のN分の空き」は重なりを統合した予定の塊の間の
+    隙間を同じ形の木で探してO(log n)で答える。終日予定は対象にしない。
+    区間は [開始, 終了) として扱う。
+    """
+
+    def __init__(self, events):
+        timed = sorted(
+            (e for e in events if not e.all_day and e.end > e.start),
+            key=lambda e: (e.start, e.end),
+        )
+        self.events = timed
+        self._starts = [e.start for e in timed]
+        self._max_end = _subtree_max([e.end for e in timed])
+
+        # 重なる予定をまとめた塊と、塊の間の隙間（秒）
+        self._block_starts = []
+        self._block_ends = []
+        for e in timed:
+            if self._block_ends and e.start <= self._block_ends[-1]:
+                self._block_ends[-1] = max(self._block_ends[-1], e.end)
+            else:
+                self._block_starts.append(e.start)
+                self._block_ends.append(e.end)
+        self._gaps = [
+            (self._block_starts[i + 1] - self._block_ends[i]).total_seconds()
+            for i in range(len(self._block_starts) - 1)
+        ]
+        self._max_gap = _subtree_max(self._gaps)
+        self._conflicts = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def at(self, moment):
+        """momentに進行中の予定のリスト（開始時刻順）。"""
+        return self._search(moment, moment, inclusive=True)
+
+    def overlapping(self, start, end):
+        """[start, end) に重なる予定のリスト（開始時刻順）。"""
+        return self._search(start, end, inclusive=False)
+
+    def conflicts_with(self, event):
+        """eventと時間が重なる他の予定のリスト。複数のカレンダーに入っている同じ予定は除く。"""
+        if event.all_day:
+            return []
+        return [e for e in self.overlapping(event.start, event.end) if e.id != event.id]
+
+    def conflict_keys(self):
+        """他の予定と重なっている予定のEvent.key集合。初回だけ計算して使い回す。"""
+        if self._conflicts is None:
+            # 開始時刻順に走査し、前の予定の終了の最大値か次の予定の開始と比べる
+            counts = Counter(e.id for e in self.events)
+            keys = set()
+            latest_end = None
+            for i, e in enumerate(self.events):
+                overlaps = (latest_end is not None and latest_end > e.start) or (
+                    i + 1 < len(self.events) and self._starts[i + 1] < e.end
+                )
+                # 同じIDの予定が他のカレンダーにもあるときだけ、相手を確かめる
+                if overlaps and (counts[e.id] == 1 or self.conflicts_with(e)):
+                    keys.add(e.key)
+                if latest_end is None or e.end > latest_end:
+                    latest_end = e.end
+            self._conflicts = frozenset(keys)
+        return self._conflicts
+
+    def next_free_slot(self, after, minutes, until=None):
+        """after以降で最初にminutes分以上空いている時間の開始時刻。untilまでに空きがなければNone。
+
+        索引に入っている最後の予定より後は空いているものとみなす。
+        """
+        need = minutes * 60
+        # afterを含む塊（なければafterより前の最後の塊）
+        i = bisect.bisect_right(self._block_starts, after) - 1
+        if i < 0:
+            # 最初の予定より前
+            if not self._block_starts or (self._block_starts[0] - after).total_seconds() >= need:
+                return self._fit(after, need, until)
+            i = 0
+        elif self._block_ends[i] <= after:
+            # 塊と塊の間（または最後の塊の後）にいる
+            if i + 1 == len(self._block_starts) or (self._block_starts[i + 1] - after).total_seconds() >= need:
+                return self._fit(after, need, until)
+            i += 1
+        # i番目の塊の終わり以降で、十分な長さの最初の隙間
+        gap = self._first_gap(i, need)
+        start = self._block_ends[gap if gap is not None else -1]
+        return self._fit(start, need, until)
+
+    @staticmethod
+    def _fit(start, need, until):
+        if until is not None and (until - start).total_seconds() < need:
+            return None
+        return start
+
+    def _first_gap(self, first, need):
+        """first番目以降で長さがneed秒以上の最初の隙間の番号。なければNone。"""
+        # 左の部分木 → 根 → 右の部分木の順にたどり、最大値が足りない部分木は飛ばす
+        stack = [(0, len(self._gaps), False)]
+        while stack:
+            lo, hi, is_node = stack.pop()
+            if is_node:
+                return lo
+            if hi <= first or lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_gap[mid] < need:
+                continue
+            stack.append((mid + 1, hi, False))
+            if mid >= first and self._gaps[mid] >= need:
+                stack.append((mid, mid + 1, True))
+            stack.append((lo, mid, False))
+        return None
+
+    def _search(self, start, end, inclusive):
+        # 開始がend以降の予定は重ならない（点の問い合わせではend以下まで含める）
+        limit = (bisect.bisect_right if inclusive else bisect.bisect_left)(self._starts, end)
+        found = []
+        stack = [(0, len(self.events))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= min(hi, limit):
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue  # この部分木の予定はすべてstartまでに終わっている
+            if mid < limit:
+                if self.events[mid].end > start:
+                    found.append(mid)
+                stack.append((mid + 1, hi))
+            stack.append((lo, mid))
+        found.sort()
+        return [self.events[i] for i in found]
+
+
+def _subtree_max(values):
+    """区間 [lo, hi) を中央の要素 (lo + hi) // 2 を根とする二分木とみなし、
+    各根の位置にその部分木の最大値を入れた配列を返す。"""
+    result = list(values)
+
+    def build(lo, hi):
+        mid = (lo + hi) // 2
+        best = values[mid]
+        if lo < mid:
+            best = max(best, build(lo, mid))
+        if mid + 1 < hi:
+            best = max(best, build(mid + 1, hi))
+        result[mid] = best
+        return best
+
+    if values:
+        build(0, len(values))
+    return result
@@ -4,10 +4,15 @@ import os
 # プロジェクトルートを基準にパスを設定
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from widget import CalendarWidget
-
 
 def main():
+    if len(sys.argv) > 1:
+        # オプション付きならGUIなしで予定を書き出す（tkinterは読み込まない）
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from widget import CalendarWidget
+
     app = CalendarWidget()
     app.run()
 
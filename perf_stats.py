@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class PerfStats:
+    """処理段階ごとの所要時間（スパン）とカウンターを集計する。
+
+    スパンは名前ごとに直近WINDOW件だけを保持し、件数・平均・p95・最大を出せる。
+    ログファイルを開いていれば、スパンが終わるたびに1行のJSONとして追記する。
+    ファイルがMAX_LOG_BYTESを超えたら ".1" に退避して新しく書き始める。
+    どのスレッドから呼んでもよい。
+    """
+
+    WINDOW = 100
+    MAX_LOG_BYTES = 512 * 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}     # 名前 -> 直近の所要時間（ミリ秒）のdeque
+        self._counts = {}    # 名前 -> スパンの累計回数
+        self._counters = {}  # 名前 -> 値
+        self._log = None
+        self._log_path = None
+
+    @contextmanager
+    def span(self, name, **fields):
+        """withブロックの所要時間を記録する。fieldsはログの行にそのまま入る。"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000, **fields)
+
+    def record(self, name, ms, **fields):
+        """計測済みの所要時間（ミリ秒）を記録する。"""
+        with self._lock:
+            window = self._spans.get(name)
+            if window is None:
+                window = self._spans[name] = deque(maxlen=self.WINDOW)
+            window.append(ms)
+            self._counts[name] = self._counts.get(name, 0) + 1
+            if self._log is not None:
+                self._write(dict(fields, t=round(time.time(), 3), span=name, ms=round(ms, 2)))
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def cache(self, name, hit):
+        """キャッシュの参照結果を数える。ヒット率はsnapshot()の"caches"に出る。"""
+        self.incr(f"{name}.{'hit' if hit else 'miss'}")
+
+    def snapshot(self):
+        """現在の集計をdictで返す。"""
+        with self._lock:
+            spans = {}
+            for name, window in self._spans.items():
+                values = sorted(window)
+                spans[name] = {
+                    "count": self._counts[name],
+                    "last": window[-1],
+                    "avg": sum(values) / len(values),
+                    "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                    "max": values[-1],
+                }
+            counters = dict(self._counters)
+        caches = {}
+        for key in counters:
+            if key.endswith(".hit") or key.endswith(".miss"):
+                name = key.rsplit(".", 1)[0]
+                hits = counters.get(f"{name}.hit", 0)
+                total = hits + counters.get(f"{name}.miss", 0)
+                caches[name] = {"hits": hits, "total": total, "rate": hits / total if total else None}
+        return {"spans": spans, "counters": counters, "caches": caches}
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counts.clear()
+            self._counters.clear()
+
+    def open_log(self, path):
+        """JSON Linesのログを開く。開けなければログなしで続ける。"""
+        with self._lock:
+            self._close_log()
+            self._log_path = path
+            try:
+                self._log = open(path, "a", encoding="utf-8")
+            except OSError:
+                self._log = None
+
+    def close_log(self):
+        with self._lock:
+            self._close_log()
+
+    def _close_log(self):
+        if self._log is not None:
+            try:
+                self._log.close()
+            except OSError:
+                pass
+            self._log = None
+
+    def _write(self, entry):
+        try:
+            self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._log.flush()
+            if self._log.tell() > self.MAX_LOG_BYTES:
+                self._log.close()
+                os.replace(self._log_path, self._log_path + ".1")
+                self._log = open(self._log_path, "a", encoding="utf-8")
+        except OSError:
+            self._log = None
+
+
+stats = PerfStats()
@@ -0,0 +1,199 @@
+"""繰り返し予定の展開（singleEvents=Falseで取得した親予定をローカルで個々の予定にする）。
+
+サーバーに展開させると毎日の定例は日数ぶんのリソースになるが、親予定と
+例外（変更・キャンセルされた回）だけを受け取って手元で展開すれば、期間が
+長いほど転送量が減る。展開はRRULE/EXRULE/RDATE/EXDATEに従い、予定自身の
+タイムゾーン（なければカレンダーのタイムゾーン）の壁時計で行うので、
+夏時間の切り替えをまたいでも開始時刻はずれない。
+
+制限: 例外（変更された回）は変更後の時刻で期間に掛かるものしか受け取れないので、
+期間内の回を期間外へ移動した例外は見えず、元の時刻の回が展開されてしまう。
+取得側（calendar_api._list_moved_exceptions）が期間の前後の例外を元の時刻だけ別に
+問い合わせてmovedで渡すので、その範囲より遠くへ移動された回だけが誤って表示される。
+このためウィジェットの既定では使わない。
+"""
+import re
+import datetime
+from zoneinfo import ZoneInfo
+from dateutil.rrule import rrulestr, rruleset
+from event_model import Event
+
+_UTC = datetime.timezone.utc
+_UNTIL = re.compile(r"UNTIL=(\d{8})(?:T(\d{6}))?(Z?)")
+
+
+def expand_items(items, calendar_id, cal_tz, start, end, memo=None, moved=()):
+    """singleEvents=Falseのevents().listの結果をEventのリスト（開始時刻順）にする。
+
+    startとendはカレンダーのタイムゾーン付きdatetimeで、この期間に掛かる回だけを返す。
+    memoにget/putを持つキャッシュを渡すと、親予定ごとの展開結果を
+    (予定のetag, 期間) をキーに使い回す。
+    movedには期間外へ移動された例外（recurringEventIdとoriginalStartTimeだけでよい）を渡す。
+    元の時刻の回を展開結果から除くためだけに使う。
+    """
+    masters = []
+    exceptions = {}  # 親予定のID -> {元の開始時刻のインスタンスID}
+    events = []
+    for item in moved:
+        exceptions.setdefault(item["recurringEventId"], set()).add(
+            instance_id(item["recurringEventId"], item["originalStartTime"], cal_tz)
+        )
+    for item in items:
+        parent = item.get("recurringEventId")
+        if parent and "originalStartTime" in item:
+            # 変更・キャンセルされた回。元の回は展開結果から除き、変更後の内容で入れる
+            exceptions.setdefault(parent, set()).add(
+                instance_id(parent, item["originalStartTime"], cal_tz)
+            )
+            if item.get("status") != "cancelled":
+                _append_if_overlaps(events, item, calendar_id, cal_tz, start, end)
+        elif item.get("status") == "cancelled":
+            continue
+        elif item.get("recurrence"):
+            masters.append(item)
+        else:
+            _append_if_overlaps(events, item, calendar_id, cal_tz, start, end)
+
+    for master in masters:
+        key = (calendar_id, master["id"], master.get("etag"), start, end, str(cal_tz))
+        occurrences = memo.get(key) if memo is not None else None
+        if occurrences is None:
+            try:
+                occurrences = expand_master(master, calendar_id, cal_tz, start, end)
+            except (KeyError, ValueError):
+                continue
+            if memo is not None:
+                memo.put(key, occurrences)
+        skipped = exceptions.get(master["id"])
+        if skipped:
+            occurrences = [e for e in occurrences if e.id not in skipped]
+        events.extend(occurrences)
+
+    events.sort(key=Event.sort_key)
+    return events
+
+
+def expand_master(master, calendar_id, cal_tz, start, end):
+    """親予定をstart以上end未満に掛かる回のEventのリストに展開する。"""
+    all_day = "date" in master["start"]
+    if all_day:
+        # 終日予定はタイムゾーンなしの日付として展開し、カレンダーのタイムゾーンの0:00にする
+        dtstart = datetime.datetime.combine(datetime.date.fromisoformat(master["start"]["date"]), datetime.time())
+        duration = datetime.date.fromisoformat(master["end"]["date"]) - dtstart.date()
+        window_start = start.astimezone(cal_tz).replace(tzinfo=None)
+        window_end = end.astimezone(cal_tz).replace(tzinfo=None)
+        event_tz = None
+    else:
+        event_tz = _zone(master["start"].get("timeZone"), cal_tz)
+        dtstart = datetime.datetime.fromisoformat(master["start"]["dateTime"]).astimezone(event_tz)
+        duration = datetime.datetime.fromisoformat(master["end"]["dateTime"]) - dtstart
+        window_start, window_end = start, end
+
+    rules = _ruleset(master["recurrence"], dtstart, event_tz)
+    occurrences = []
+    # 開始がwindow_startより前でも、終了が期間に掛かる回は含める
+    for occurrence in rules.between(window_start - duration, window_end, inc=True):
+        if occurrence + duration <= window_start or occurrence >= window_end:
+            continue
+        if all_day:
+            occ_start = datetime.datetime(occurrence.year, occurrence.month, occurrence.day, tzinfo=cal_tz)
+            occ_end = occ_start + duration
+            original = {"date": occurrence.date().isoformat()}
+        else:
+            occ_start = occurrence.astimezone(cal_tz)
+            occ_end = (occurrence + duration).astimezone(cal_tz)
+            original = {"dateTime": occurrence.isoformat()}
+        occurrences.append(Event(
+            instance_id(master["id"], original, cal_tz),
+            calendar_id,
+            master.get("summary", "(タイトルなし)"),
+            master.get("location", ""),
+            all_day,
+            occ_start,
+            occ_end,
+        ))
+    return occurrences
+
+
+def instance_id(master_id, original_start, cal_tz):
+    """サーバー側の展開と同じ形式のインスタンスID（"親ID_YYYYMMDDTHHMMSSZ" / "親ID_YYYYMMDD"）。"""
+    if "date" in original_start:
+        return f"{master_id}_{original_start['date'].replace('-', '')}"
+    value = datetime.datetime.fromisoformat(original_start["dateTime"])
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_zone(original_start.get("timeZone"), cal_tz))
+    return f"{master_id}_{value.astimezone(_UTC):%Y%m%dT%H%M%SZ}"
+
+
+def _append_if_overlaps(events, item, calendar_id, cal_tz, start, end):
+    try:
+        event = Event.from_api(item, calendar_id, cal_tz)
+    except (KeyError, ValueError):
+        return
+    if event.end > start and event.start < end:
+        events.append(event)
+
+
+def _zone(name, default):
+    if not name:
+        return default
+    try:
+        return ZoneInfo(name)
+    except (KeyError, ValueError):
+        return default
+
+
+def _ruleset(lines, dtstart, event_tz):
+    """recurrenceの各行からrrulesetを組み立てる。event_tzがNoneなら終日予定（タイムゾーンなし）。"""
+    rules = rruleset()
+    for line in lines:
+        name = line.split(":", 1)[0].split(";", 1)[0].upper()
+        if name in ("RRULE", "EXRULE"):
+            rule = rrulestr(_normalize_until(line, event_tz), dtstart=dtstart)
+            (rules.rrule if name == "RRULE" else rules.exrule)(rule)
+        elif name in ("RDATE", "EXDATE"):
+            for value in _parse_dates(line, dtstart, event_tz):
+                (rules.rdate if name == "RDATE" else rules.exdate)(value)
+    return rules
+
+
+def _normalize_until(line, event_tz):
+    """UNTILをdtstartに合わせる（タイムゾーン付きならUTC、終日なら日付のみ）。
+
+    dateutilはdtstartとUNTILのタイムゾーンの有無が食い違うと例外にする。
+    """
+    def replace(match):
+        day, time, utc = match.groups()
+        if event_tz is None:
+            return f"UNTIL={day}T{time or '235959'}"
+        if utc:
+            return match.group(0)
+        until = datetime.datetime.strptime(day + (time or "235959"), "%Y%m%d%H%M%S")
+        return f"UNTIL={until.replace(tzinfo=event_tz).astimezone(_UTC):%Y%m%dT%H%M%SZ}"
+
+    return _UNTIL.sub(replace, line)
+
+
+def _parse_dates(line, dtstart, event_tz):
+    """RDATE/EXDATEの行から日時を取り出す。dtstartと同じ形（タイムゾーンの有無）にそろえる。"""
+    head, _, values = line.partition(":")
+    params = dict(p.split("=", 1) for p in head.split(";")[1:] if "=" in p)
+    value_tz = _zone(params.get("TZID"), event_tz)
+    for value in values.split(","):
+        value = value.strip()
+        if not value or "/" in value:
+            continue  # 期間（PERIOD）形式はGoogleカレンダーでは使われない
+        if len(value) == 8:
+            day = datetime.datetime.strptime(value, "%Y%m%d")
+            if event_tz is None:
+                yield day
+            else:
+                yield datetime.datetime.combine(day.date(), dtstart.timetz())
+            continue
+        parsed = datetime.datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+        if event_tz is None:
+            yield parsed.replace(hour=0, minute=0, second=0)
+        elif value.endswith("Z"):
+            yield parsed.replace(tzinfo=_UTC).astimezone(event_tz)
+        else:
+            yield parsed.replace(tzinfo=value_tz).astimezone(event_tz)
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+
+class _Job:
+    __slots__ = ("generation", "fetch", "on_result", "on_error", "relevant", "on_progress")
+
+    def __init__(self, generation, fetch, on_result, on_error, relevant, on_progress):
+        self.generation = generation
+        self.fetch = fetch
+        self.on_result = on_result
+        self.on_error = on_error
+        self.relevant = relevant
+        self.on_progress = on_progress
+
+
+class RefreshCoordinator:
+    """予定の取得を1本のワーカースレッドで順番に実行する。
+
+    - 同じキーの要求が待ち行列にあれば1つにまとめる
+    - 待ち行列は上限を超えたら古いものから捨てる
+    - 実行直前にrelevant()がFalseになった要求は実行しない（表示日を離れた場合など）
+    - 同じキーで新しい世代の結果を反映済みなら、古い世代の結果は捨てる
+
+    結果のコールバックはpost（Tkスレッドで実行する関数）経由で呼ばれる。
+    """
+
+    def __init__(self, post, max_pending=4):
+        self._post = post
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # key -> _Job
+        self._generation = 0
+        self._delivered = {}  # key -> 反映済みの最新世代
+        self._cancelled_before = 0  # この世代以下の結果は反映しない
+        self._thread = None
+
+    def submit(self, key, fetch, on_result, on_error, relevant=None, on_progress=None):
+        """取得を依頼し、その世代番号を返す。fetchはワーカースレッドで実行される。
+
+        on_progressを渡すと、fetchは途中結果を報告する関数を引数に受け取る。報告された
+        途中結果は結果と同じくpost経由でon_progressに渡り、cancel_all()後や同じキーで
+        新しい世代の結果を反映済みなら捨てられる。
+        """
+        with self._cond:
+            self._generation += 1
+            job = _Job(self._generation, fetch, on_result, on_error, relevant, on_progress)
+            self._pending.pop(key, None)
+            self._pending[key] = job
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return job.generation
+
+    def cancel_all(self):
+        """待ち行列の要求をすべて捨て、実行中の要求の結果も反映しないようにする。"""
+        with self._cond:
+            self._pending.clear()
+            self._delivered.clear()
+            # 以降に届く結果はすべて古い世代として扱う
+            self._cancelled_before = self._generation
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key, job = self._pending.popitem(last=False)
+            if job.relevant is not None and not job.relevant():
+                continue
+            try:
+                if job.on_progress is not None:
+                    result = job.fetch(
+                        lambda value, k=key, j=job: self._post(
+                            lambda: self._deliver_progress(k, j, value)
+                        )
+                    )
+                else:
+                    result = job.fetch()
+                callback = job.on_result
+            except Exception as e:
+                result = e
+                callback = job.on_error
+            self._post(lambda k=key, j=job, cb=callback, r=result: self._deliver(k, j, cb, r))
+
+    def _deliver(self, key, job, callback, result):
+        with self._cond:
+            if job.generation <= self._cancelled_before:
+                return
+            if job.generation < self._delivered.get(key, 0):
+                return
+            self._delivered[key] = job.generation
+        callback(result)
+
+    def _deliver_progress(self, key, job, value):
+        with self._cond:
+            if job.generation <= self._cancelled_before:
+                return
+            if job.generation <= self._delivered.get(key, 0):
+                return  # 結果（またはより新しい世代の結果）を反映済み
+        job.on_progress(value)
@@ -0,0 +1,98 @@
+import random
+import datetime
+
+import pytest
+
+from event_model import Event
+from interval_index import IntervalIndex
+
+UTC = datetime.timezone.utc
+BASE = datetime.datetime(2026, 10, 1, tzinfo=UTC)
+
+
+def _event(event_id, start_min, length_min, calendar_id="primary", all_day=False):
+    start = BASE + datetime.timedelta(minutes=start_min)
+    return Event(event_id, calendar_id, event_id, "", all_day, start,
+                 start + datetime.timedelta(minutes=length_min))
+
+
+def _minutes(n):
+    return BASE + datetime.timedelta(minutes=n)
+
+
+def _random_events(rng, count):
+    return [
+        _event(str(i % 25), 15 * rng.randint(0, 200), 15 * rng.randint(0, 8),
+               calendar_id=rng.choice("ab"), all_day=rng.random() < 0.1)
+        for i in range(count)
+    ]
+
+
+def _timed(events):
+    return [e for e in events if not e.all_day and e.end > e.start]
+
+
+def _brute_next_free(events, after, minutes):
+    moment = after
+    while True:
+        busy = [e for e in events
+                if e.start < moment + datetime.timedelta(minutes=minutes) and e.end > moment]
+        if not busy:
+            return moment
+        moment = max(e.end for e in busy)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    events = _random_events(rng, rng.randint(0, 40))
+    index = IntervalIndex(events)
+    timed = _timed(events)
+
+    for _ in range(20):
+        t = _minutes(rng.randint(-30, 3200))
+        u = t + datetime.timedelta(minutes=rng.randint(0, 300))
+        assert {e.key for e in index.at(t)} == {e.key for e in timed if e.start <= t < e.end}
+        assert {e.key for e in index.overlapping(t, u)} == {
+            e.key for e in timed if e.start < u and e.end > t
+        }
+        minutes = rng.choice([15, 30, 60, 120])
+        assert index.next_free_slot(t, minutes) == _brute_next_free(timed, t, minutes)
+
+    expected = {
+        e.key for e in timed
+        if any(o is not e and o.id != e.id and o.start < e.end and o.end > e.start for o in timed)
+    }
+    assert index.conflict_keys() == expected
+
+
+def test_intervals_are_half_open():
+    index = IntervalIndex([_event("a", 0, 60), _event("b", 60, 30)])
+    assert [e.id for e in index.at(_minutes(60))] == ["b"]
+    assert index.conflict_keys() == frozenset()
+    assert index.next_free_slot(_minutes(0), 30) == _minutes(90)
+
+
+def test_all_day_and_duplicate_events_are_not_conflicts():
+    events = [
+        _event("holiday", 0, 24 * 60, all_day=True),
+        _event("meeting", 60, 60, calendar_id="primary"),
+        _event("meeting", 60, 60, calendar_id="team"),
+    ]
+    index = IntervalIndex(events)
+    assert index.conflict_keys() == frozenset()
+    assert [e.calendar_id for e in index.at(_minutes(90))] == ["primary", "team"]
+
+
+def test_next_free_slot_respects_until():
+    index = IntervalIndex([_event("a", 0, 60), _event("b", 70, 60)])
+    assert index.next_free_slot(_minutes(0), 30) == _minutes(130)
+    assert index.next_free_slot(_minutes(0), 30, until=_minutes(150)) is None
+    assert index.next_free_slot(_minutes(0), 10) == _minutes(60)
+
+
+def test_empty_index():
+    index = IntervalIndex([])
+    assert index.at(BASE) == []
+    assert index.overlapping(BASE, _minutes(60)) == []
+    assert index.next_free_slot(BASE, 30) == BASE
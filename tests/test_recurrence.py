@@ -0,0 +1,123 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+from recurrence import expand_items, instance_id
+
+TOKYO = ZoneInfo("Asia/Tokyo")
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def _window(tz, first, last):
+    """first日からlast日の終わりまでの [開始, 終了)。"""
+    start = datetime.datetime(first.year, first.month, first.day, tzinfo=tz)
+    end = datetime.datetime(last.year, last.month, last.day, tzinfo=tz) + datetime.timedelta(days=1)
+    return start, end
+
+
+def _master(recurrence, start="2026-10-05T10:00:00+09:00", end="2026-10-05T11:00:00+09:00",
+            tz="Asia/Tokyo", event_id="m"):
+    return {
+        "id": event_id, "etag": '"1"', "summary": "定例",
+        "start": {"dateTime": start, "timeZone": tz},
+        "end": {"dateTime": end, "timeZone": tz},
+        "recurrence": recurrence,
+    }
+
+
+def _expand(items, tz=TOKYO, first=datetime.date(2026, 10, 1), last=datetime.date(2026, 10, 31)):
+    start, end = _window(tz, first, last)
+    return expand_items(items, "primary", tz, start, end)
+
+
+def _starts(events):
+    return [e.start.strftime("%m-%d %H:%M") for e in events]
+
+
+def test_count_and_instance_ids_match_server_format():
+    events = _expand([_master(["RRULE:FREQ=DAILY;COUNT=3"])])
+    assert _starts(events) == ["10-05 10:00", "10-06 10:00", "10-07 10:00"]
+    assert events[0].id == "m_20261005T010000Z"
+    assert all(e.end - e.start == datetime.timedelta(hours=1) for e in events)
+
+
+def test_exdate_removes_occurrence():
+    events = _expand([_master([
+        "RRULE:FREQ=DAILY;COUNT=4",
+        "EXDATE;TZID=Asia/Tokyo:20261006T100000",
+    ])])
+    assert _starts(events) == ["10-05 10:00", "10-07 10:00", "10-08 10:00"]
+
+
+def test_until_without_timezone_is_normalized():
+    # UNTILがタイムゾーンなしでもdtstartとの食い違いで例外にならず、その日の回まで含む
+    events = _expand([_master(["RRULE:FREQ=DAILY;UNTIL=20261007"])])
+    assert _starts(events) == ["10-05 10:00", "10-06 10:00", "10-07 10:00"]
+
+
+def test_modified_and_cancelled_instances():
+    moved = {
+        "id": "m_20261006T010000Z", "recurringEventId": "m", "summary": "定例（変更）",
+        "originalStartTime": {"dateTime": "2026-10-06T10:00:00+09:00"},
+        "start": {"dateTime": "2026-10-06T15:00:00+09:00"},
+        "end": {"dateTime": "2026-10-06T16:00:00+09:00"},
+    }
+    cancelled = {
+        "id": "m_20261007T010000Z", "recurringEventId": "m", "status": "cancelled",
+        "originalStartTime": {"dateTime": "2026-10-07T10:00:00+09:00"},
+    }
+    events = _expand([_master(["RRULE:FREQ=DAILY;COUNT=4"]), moved, cancelled])
+    assert _starts(events) == ["10-05 10:00", "10-06 15:00", "10-08 10:00"]
+    assert events[1].summary == "定例（変更）"
+
+
+def test_occurrences_outside_window_are_skipped():
+    events = _expand(
+        [_master(["RRULE:FREQ=DAILY;COUNT=10"])],
+        first=datetime.date(2026, 10, 7), last=datetime.date(2026, 10, 8),
+    )
+    assert _starts(events) == ["10-07 10:00", "10-08 10:00"]
+
+
+def test_wall_clock_is_kept_across_dst_change():
+    # 2026-11-01にニューヨークで夏時間が終わる。開始時刻は9:00のまま
+    master = _master(
+        ["RRULE:FREQ=WEEKLY;COUNT=3"],
+        start="2026-10-25T09:00:00-04:00", end="2026-10-25T09:30:00-04:00",
+        tz="America/New_York",
+    )
+    events = _expand(
+        [master], tz=NEW_YORK, first=datetime.date(2026, 10, 20), last=datetime.date(2026, 11, 15),
+    )
+    assert _starts(events) == ["10-25 09:00", "11-01 09:00", "11-08 09:00"]
+    assert [e.start.utcoffset().total_seconds() / 3600 for e in events] == [-4, -5, -5]
+    assert events[1].id == "m_20261101T140000Z"
+
+
+def test_all_day_with_exdate():
+    master = {
+        "id": "d", "summary": "休暇",
+        "start": {"date": "2026-10-10"}, "end": {"date": "2026-10-11"},
+        "recurrence": ["RRULE:FREQ=DAILY;COUNT=3", "EXDATE;VALUE=DATE:20261011"],
+    }
+    events = _expand([master])
+    assert _starts(events) == ["10-10 00:00", "10-12 00:00"]
+    assert all(e.all_day for e in events)
+    assert events[1].id == "d_20261012"
+
+
+def test_instance_id_for_floating_time_uses_calendar_timezone():
+    original = {"dateTime": "2026-10-05T10:00:00"}
+    assert instance_id("m", original, TOKYO) == "m_20261005T010000Z"
+
+
+def test_moved_out_exception_suppresses_original_occurrence():
+    # 10/6の回が期間外（11/20）へ移動された。期間の問い合わせには現れないので、movedで渡す
+    moved = {
+        "recurringEventId": "m",
+        "originalStartTime": {"dateTime": "2026-10-06T10:00:00+09:00"},
+    }
+    start, end = _window(TOKYO, datetime.date(2026, 10, 1), datetime.date(2026, 10, 31))
+    events = expand_items(
+        [_master(["RRULE:FREQ=DAILY;COUNT=3"])], "primary", TOKYO, start, end, moved=[moved],
+    )
+    assert _starts(events) == ["10-05 10:00", "10-07 10:00"]
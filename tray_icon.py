@@ -0,0 +1,179 @@
+import math
+import datetime
+from collections import OrderedDict
+
+from deadline_timer import DeadlineTimer
+
+
+COUNTDOWN_MINUTES = 60  # 次の予定までこれ以内ならアイコンに残り分数を出す
+TOOLTIP_MAX = 127  # Windowsの通知領域のツールチップの上限
+
+
+def tray_state(events, now):
+    """今日の予定と現在時刻から、トレイに出す内容と次に内容が変わる時刻を求める。
+
+    戻り値は ((日, バッジ文字列かNone, 進行中の予定があるか), ツールチップ, 次に変わる時刻)。
+    eventsは開始時刻順。
+    """
+    timed = [e for e in events if not e.all_day]
+    current = [e for e in timed if e.start <= now < e.end]
+    upcoming = next((e for e in timed if e.start > now), None)
+    tomorrow = now.date() + datetime.timedelta(days=1)
+    changes = [datetime.datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=now.tzinfo)]
+    changes.extend(e.end for e in current)
+
+    lines = [f"今日の予定 ({now.month}/{now.day})"]
+    for event in current:
+        lines.append(f"進行中: {event.summary} (〜{event.end.strftime('%H:%M')})")
+
+    badge = None
+    if upcoming is not None:
+        seconds = (upcoming.start - now).total_seconds()
+        minutes = math.ceil(seconds / 60)
+        changes.append(upcoming.start)
+        line = f"次: {upcoming.start.strftime('%H:%M')} {upcoming.summary}"
+        if minutes <= COUNTDOWN_MINUTES:
+            badge = str(minutes)
+            line += f" (あと{minutes}分)"
+            # 残り分数が1つ減る時刻
+            changes.append(upcoming.start - datetime.timedelta(minutes=minutes - 1))
+        else:
+            # 残り分数を出し始める時刻
+            changes.append(upcoming.start - datetime.timedelta(minutes=COUNTDOWN_MINUTES))
+        lines.append(line)
+    elif not current:
+        lines.append("残りの予定はありません")
+
+    tooltip = "\n".join(lines)
+    if len(tooltip) > TOOLTIP_MAX:
+        tooltip = tooltip[:TOOLTIP_MAX - 1] + "…"
+    state = (now.day, badge, bool(current))
+    return state, tooltip, min(c for c in changes if c > now)
+
+
+class TrayIconUpdater:
+    """トレイアイコンとツールチップを、表示内容が変わるときだけ描き直す。
+
+    日付の変わり目・残り分数の変化・予定の開始/終了のうち最も早い時刻にだけ
+    タイマーを掛ける。
+    """
+
+    def __init__(self, root, now):
+        self.root = root
+        self._now = now
+        self._events = []
+        self._icon = None
+        self._renderer = None
+        self._shown = None  # 最後に反映した (状態, ツールチップ)
+        self._timer = DeadlineTimer(root, now)
+
+    def attach(self, icon, renderer):
+        """pystrayのアイコンと描画器を登録する。Tkのスレッドから呼ぶ。"""
+        self._icon = icon
+        self._renderer = renderer
+        self._shown = None
+        self._update()
+
+    def set_events(self, events):
+        self._events = events
+        self._update()
+
+    def _update(self):
+        if self._icon is None:
+            self._timer.cancel()
+            return
+        now = self._now()
+        state, tooltip, next_change = tray_state(self._events, now)
+        shown_state, shown_tooltip = self._shown or (None, None)
+        if state != shown_state:
+            self._icon.icon = self._renderer.render(*state)
+        if tooltip != shown_tooltip:
+            self._icon.title = tooltip
+        self._shown = (state, tooltip)
+        self._timer.arm(next_change, self._update)
+
+
+class TrayIconRenderer:
+    """トレイアイコンを、事前に描いたレイヤー（背景・日付・バッジ）の重ね合わせで作る。
+
+    レイヤーは一度描いたら使い回し、合成済みの画像も直近の数枚を保持する。
+    """
+
+    SIZE = 64
+    COMPOSED_CACHE_SIZE = 8
+
+    def __init__(self, theme):
+        from PIL import Image, ImageDraw, ImageFont
+
+        self._Image = Image
+        self._ImageDraw = ImageDraw
+        self.theme = theme
+        self._day_font = self._font(ImageFont, 26, bold=True)
+        self._badge_font = self._font(ImageFont, 18, bold=True)
+        self._backgrounds = {}  # 進行中か -> 背景レイヤー
+        self._glyphs = {}       # 日 -> 日付レイヤー
+        self._badges = {}       # 文字列 -> バッジレイヤー
+        self._composed = OrderedDict()
+
+    @staticmethod
+    def _font(ImageFont, size, bold=False):
+        for name in (("segoeuib.ttf", "arialbd.ttf") if bold else ("segoeui.ttf", "arial.ttf")):
+            try:
+                return ImageFont.truetype(name, size)
+            except OSError:
+                continue
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:
+            return ImageFont.load_default()
+
+    def render(self, day, badge, busy):
+        key = (day, badge, busy)
+        image = self._composed.get(key)
+        if image is not None:
+            self._composed.move_to_end(key)
+            return image
+        image = self._background(busy).copy()
+        image.alpha_composite(self._glyph(day))
+        if badge is not None:
+            image.alpha_composite(self._badge(badge))
+        self._composed[key] = image
+        while len(self._composed) > self.COMPOSED_CACHE_SIZE:
+            self._composed.popitem(last=False)
+        return image
+
+    def _layer(self):
+        image = self._Image.new("RGBA", (self.SIZE, self.SIZE), (0, 0, 0, 0))
+        return image, self._ImageDraw.Draw(image)
+
+    def _background(self, busy):
+        layer = self._backgrounds.get(busy)
+        if layer is None:
+            t = self.theme
+            layer, draw = self._layer()
+            draw.rectangle([8, 16, 56, 56], fill=t.ACCENT_COLOR, outline=t.HEADER_BG, width=2)
+            # 予定の最中はヘッダー部分の色を変える
+            draw.rectangle([8, 16, 56, 28], fill=t.ALERT_ON_COLOR if busy else "#f38ba8")
+            self._backgrounds[busy] = layer
+        return layer
+
+    def _glyph(self, day):
+        layer = self._glyphs.get(day)
+        if layer is None:
+            layer, draw = self._layer()
+            draw.text(
+                (32, 43), str(day), fill=self.theme.BG_COLOR, font=self._day_font, anchor="mm",
+            )
+            self._glyphs[day] = layer
+        return layer
+
+    def _badge(self, text):
+        layer = self._badges.get(text)
+        if layer is None:
+            layer, draw = self._layer()
+            draw.rounded_rectangle(
+                [30, 38, 63, 63], radius=8, fill="#f38ba8", outline=self.theme.BG_COLOR, width=2,
+            )
+            draw.text((47, 51), text, fill=self.theme.BG_COLOR, font=self._badge_font, anchor="mm")
+            self._badges[text] = layer
+        return layer
@@ -0,0 +1,174 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class VirtualEventList:
+    """予定をCanvasアイテムとして直接描画する仮想化リスト。
+
+    画面に見えている行と前後数行（オーバースキャン）だけを描画し、スクロールで
+    見えなくなった行のアイテムは使い回す。予定の件数が多くても構築時間と
+    メモリはほぼ一定になる。
+    """
+
+    ROW_HEIGHT = 58
+    OVERSCAN = 4
+    SCROLL_STEP = 29  # マウスホイール1目盛りあたりのピクセル数
+
+    def __init__(self, parent, theme, on_click):
+        self.theme = theme
+        self.on_click = on_click
+        self.canvas = tk.Canvas(
+            parent, bg=theme.BG_COLOR, highlightthickness=0, width=theme.width
+        )
+        self.events = []
+        self.current_keys = set()
+        self.conflict_keys = frozenset()
+        self._top = 0      # スクロール位置（ピクセル）
+        self._rows = {}    # 行番号 -> そのアイテムID群
+        self._free = []    # 非表示で待機しているアイテムID群
+        self._title_font = tkfont.Font(family="Segoe UI", size=10)
+        self._title_bold = tkfont.Font(family="Segoe UI", size=10, weight="bold")
+        self._small_font = tkfont.Font(family="Segoe UI", size=8)
+        self.canvas.bind("<Configure>", lambda e: self._redraw())
+        self.canvas.bind("<Button-1>", self._on_click)
+
+    def content_height(self):
+        return len(self.events) * self.ROW_HEIGHT
+
+    def set_events(self, events, current_keys, conflict_keys=frozenset()):
+        """表示する予定を入れ替える。スクロール位置は可能な範囲で維持する。"""
+        self.events = events
+        self.current_keys = current_keys
+        self.conflict_keys = conflict_keys
+        for row in list(self._rows):
+            self._release(row)
+        self._top = min(self._top, self._max_top())
+        self._redraw()
+
+    def scroll(self, units):
+        """units行ぶん（負で上へ）スクロールする。"""
+        new_top = min(max(0, self._top + units * self.SCROLL_STEP), self._max_top())
+        delta = new_top - self._top
+        if delta == 0:
+            return
+        self._top = new_top
+        # 描画済みのアイテムはまとめて動かし、足りない行だけ追加で描く
+        self.canvas.move("row", 0, -delta)
+        self._redraw()
+
+    def _max_top(self):
+        return max(0, self.content_height() - max(1, self.canvas.winfo_height()))
+
+    def _visible_rows(self):
+        height = max(self.canvas.winfo_height(), self.ROW_HEIGHT)
+        first = max(0, self._top // self.ROW_HEIGHT - self.OVERSCAN)
+        last = min(len(self.events), (self._top + height) // self.ROW_HEIGHT + 1 + self.OVERSCAN)
+        return range(first, last)
+
+    def _redraw(self):
+        visible = self._visible_rows()
+        for row in [r for r in self._rows if r not in visible]:
+            self._release(row)
+        for row in visible:
+            if row not in self._rows:
+                self._draw(row)
+
+    def _release(self, row):
+        items = self._rows.pop(row)
+        for item in items:
+            self.canvas.itemconfigure(item, state="hidden")
+        self._free.append(items)
+
+    def _allocate(self):
+        if self._free:
+            return self._free.pop()
+        t = self.theme
+        c = self.canvas
+        return (
+            c.create_rectangle(0, 0, 0, 0, width=0, tags="row"),                 # 背景
+            c.create_rectangle(0, 0, 0, 0, width=0, tags="row"),                 # アクセントバー
+            c.create_rectangle(0, 0, 0, 0, width=0, fill=t.ALLDAY_BG, tags="row"),  # 終日ラベル背景
+            c.create_text(0, 0, anchor="nw", font=self._small_font, tags="row"),  # 時刻
+            c.create_text(0, 0, anchor="nw", tags="row"),                          # タイトル
+            c.create_text(0, 0, anchor="nw", font=self._small_font,
+                          fill=t.LOCATION_COLOR, tags="row"),                      # 場所
+            c.create_line(0, 0, 0, 0, fill=t.BORDER_COLOR, tags="row"),          # 区切り線
+        )
+
+    def _draw(self, row):
+        t = self.theme
+        c = self.canvas
+        event = self.events[row]
+        is_current = event.key in self.current_keys
+        is_conflict = event.key in self.conflict_keys
+        bg_item, bar, allday_bg, time_item, title_item, loc_item, sep = items = self._allocate()
+        self._rows[row] = items
+
+        y = row * self.ROW_HEIGHT - self._top
+        w = t.width
+        bg = t.CURRENT_BG if is_current else t.BG_COLOR
+        text_w = w - 40
+
+        c.coords(bg_item, 6, y + 2, w - 6, y + self.ROW_HEIGHT - 2)
+        c.itemconfigure(bg_item, fill=bg, state="normal")
+        c.coords(bar, 6, y + 6, 9, y + self.ROW_HEIGHT - 6)
+        if is_current:
+            bar_color = t.CURRENT_FG
+        elif is_conflict:
+            bar_color = t.CONFLICT_COLOR
+        else:
+            bar_color = t.ACCENT_COLOR
+        c.itemconfigure(bar, fill=bar_color, state="normal")
+
+        if event.all_day:
+            time_str = "終日"
+        else:
+            time_str = f"{event.start.strftime('%H:%M')} - {event.end.strftime('%H:%M')}"
+        if is_conflict:
+            time_str += "  \u26a0 重複"
+        c.coords(time_item, 19, y + 6)
+        c.itemconfigure(
+            time_item, text=time_str, state="normal",
+            fill=t.FG_COLOR if event.all_day else (t.CONFLICT_COLOR if is_conflict else t.TIME_COLOR),
+        )
+        if event.all_day:
+            x0, y0, x1, y1 = c.bbox(time_item)
+            c.coords(allday_bg, x0 - 2, y0, x1 + 2, y1)
+            c.itemconfigure(allday_bg, state="normal")
+            c.tag_raise(time_item, allday_bg)
+
+        font = self._title_bold if is_current else self._title_font
+        c.coords(title_item, 19, y + 20)
+        c.itemconfigure(
+            title_item, text=self._fit(event.summary, font, text_w), font=font,
+            fill=t.CURRENT_FG if is_current else t.FG_COLOR, state="normal",
+        )
+
+        if event.location:
+            c.coords(loc_item, 19, y + 39)
+            c.itemconfigure(
+                loc_item, state="normal",
+                text=self._fit(f"\U0001f4cd {event.location}", self._small_font, text_w),
+            )
+
+        c.coords(sep, 10, y + self.ROW_HEIGHT - 1, w - 10, y + self.ROW_HEIGHT - 1)
+        c.itemconfigure(sep, state="normal")
+
+    @staticmethod
+    def _fit(text, font, max_width):
+        """1行に収まらない文字列を末尾「…」で切り詰める。"""
+        if font.measure(text) <= max_width:
+            return text
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if font.measure(text[:mid] + "…") <= max_width:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo] + "…"
+
+    def _on_click(self, event):
+        row = (event.y + self._top) // self.ROW_HEIGHT
+        if 0 <= row < len(self.events) and self.events[row].id:
+            self.on_click(self.events[row])
@@ -1,12 +1,27 @@
 import tkinter as tk
+import time
 import datetime
 import threading
 import webbrowser
-import winsound
 from zoneinfo import ZoneInfo
-import pystray
-from PIL import Image, ImageDraw
-from calendar_api import get_events_for_date, get_user_email, is_logged_in, login, logout
+from calendar_api import (
+    PERF_LOG_PATH, fetch_user_profile, get_cached_profile, get_event_detail,
+    get_events_for_range, get_fetch_timings, get_free_busy_calendars, get_selected_calendars,
+    is_logged_in, list_calendars, login, logout, query_free_busy, set_free_busy_calendars,
+    set_selected_calendars,
+)
+from event_window import EventWindowCache
+from event_sync import EventSyncStore
+from event_cache import EventCache
+from alert_scheduler import AlertScheduler
+from event_clock import EventClock
+from event_cards import EventListView
+from virtual_list import VirtualEventList
+from free_busy_strip import FreeBusyStrip
+from interval_index import IntervalIndex
+from refresh_coordinator import RefreshCoordinator
+from perf_stats import stats
+from tray_icon import TrayIconUpdater
 
 
 class CalendarWidget:
@@ -25,9 +40,26 @@ class CalendarWidget:
     ALERT_ON_COLOR = "#f9e2af"
     ALERT_OFF_COLOR = "#6c7086"
     LINK_COLOR = "#74c7ec"
-
-    ALERT_CHECK_MS = 30 * 1000  # 30秒ごとにアラートチェック
-    ALERT_MINUTES_BEFORE = 5    # 何分前に通知するか
+    STALE_COLOR = "#f9e2af"
+    CONFLICT_COLOR = "#f38ba8"
+
+    ALERT_MINUTES_BEFORE = 5    # 何分前に通知するか（既定値）
+    PREFETCH_DAYS = 3           # 表示日の前後に先読みする日数
+    INCREMENTAL_SYNC = True     # syncTokenによる差分同期を使うか
+    LOCAL_RECURRENCE = False    # 繰り返し予定をサーバーで展開させず、ローカルで展開するか
+    VIRTUAL_LIST_THRESHOLD = 60  # これより予定が多い日はCanvas描画の仮想化リストで表示
+
+    # 自動更新の間隔（ミリ秒）
+    AUTO_REFRESH_SOON_MS = 60 * 1000         # 次の予定が近いとき
+    AUTO_REFRESH_MS = 5 * 60 * 1000          # 通常
+    AUTO_REFRESH_IDLE_MS = 15 * 60 * 1000    # 今日の残りの予定がない / トレイに格納中
+    AUTO_REFRESH_MAX_MS = 30 * 60 * 1000     # エラー時のバックオフ上限
+    AUTO_REFRESH_SOON_MINUTES = 30           # 次の予定まで何分以内なら「近い」とみなすか
+
+    DISK_CACHE_KEEP_DAYS = 30  # ディスクキャッシュに残す過去の日数
+    FREE_BUSY_TTL = 5 * 60  # 秒。空き状況をこれより新しければ再取得しない
+    FREE_SLOT_MINUTES = 30  # 「次の空き時間」で探す空きの長さ（分）
+    DEBUG_OVERLAY_MS = 1000  # デバッグ表示の更新間隔（表示中のみ）
 
     def __init__(self):
         self.root = tk.Tk()
@@ -39,11 +71,26 @@ class CalendarWidget:
 
         self.topmost = True
         self.events = []
+        self.event_index = IntervalIndex([])  # 表示日の予定の索引（進行中・重複の判定用）
         self.tray_icon = None
         self.cal_tz = None  # Googleカレンダーのタイムゾーン
         self.display_date = datetime.date.today()
         self.alert_enabled = False
-        self._alerted_events = set()  # 既にアラート済みのイベント(start時刻文字列)
+        self.window_cache = EventWindowCache(prefetch_days=self.PREFETCH_DAYS)
+        self.selected_calendars = get_selected_calendars()
+        self.free_busy_calendars = get_free_busy_calendars()
+        self._free_busy = {}  # 日付 -> (取得時刻, query_free_busyの結果)
+        self.sync_store = EventSyncStore(calendar_id=self.selected_calendars[0])
+        self.event_cache = EventCache()
+        # 取得は1本のワーカーで順に行い、古くなった要求・結果は捨てる
+        self.refresher = RefreshCoordinator(lambda fn: self.root.after(0, fn))
+        self._auto_refresh_timer = None
+        self._refresh_errors = 0  # 連続した取得エラーの回数
+        self._showing_stale = False  # ディスクキャッシュの古い予定を表示中か
+        self._shown_day = None  # 予定一覧に表示している予定の日付
+        self._debug_timer = None  # デバッグ表示中の更新タイマー
+        # 各処理段階の所要時間をJSON Linesで記録する（一定サイズで古い分を退避）
+        stats.open_log(PERF_LOG_PATH)
 
         # ウィンドウサイズと位置
         self.width = 320
@@ -54,12 +101,28 @@ class CalendarWidget:
         self._drag_y = 0
 
         self._build_ui()
+        self.alert_scheduler = AlertScheduler(
+            self.root, self._show_alert, lead_minutes=self.ALERT_MINUTES_BEFORE,
+            now=self._get_now,
+        )
+        self.tray_updater = TrayIconUpdater(self.root, self._get_now)
+        # 予定の開始・終了の瞬間にだけ、終了済みの非表示と進行中の強調を掛け直す
+        self.display_clock = EventClock(self.root, self._get_now, self._on_clock_tick)
+
+        # 前回の予定をディスクキャッシュから即表示する（ログアウト時に消えるので残っていればログイン済み）
+        self._show_cached(self.display_date)
+        # トレイアイコンとログイン状態のチェックは最初の描画が終わってから行う
+        self.root.after_idle(self._finish_startup)
+
+    def _finish_startup(self):
         self._setup_tray_icon()
-        self._check_alerts()
 
         # ログイン状態チェック
         if is_logged_in():
             self._refresh_events()
+            self._schedule_auto_refresh()
+            if get_cached_profile() is None:
+                self._load_profile_async()
         else:
             self._show_login_screen()
 
@@ -140,7 +203,12 @@ class CalendarWidget:
         next_btn.bind("<Button-1>", lambda e: self._change_date(1))
 
         # 境界線
-        tk.Frame(self.root, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X)
+        self._nav_border = tk.Frame(self.root, bg=self.BORDER_COLOR, height=1)
+        self._nav_border.pack(fill=tk.X)
+
+        # 空き状況の帯（対象のカレンダーを設定したときだけpackする）
+        self.free_busy_strip = FreeBusyStrip(self.root, self)
+        self._free_busy_visible = False
 
         # === イベント表示エリア ===
         self.canvas = tk.Canvas(
@@ -156,12 +224,29 @@ class CalendarWidget:
             (0, 0), window=self.events_frame, anchor="nw", width=self.width
         )
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.event_list = EventListView(self.events_frame, self, self._show_event_detail)
+        self._list_active = True  # events_frameにevent_list以外を表示していないか
+        # 予定が多い日用の仮想化リスト（必要になるまでpackしない）
+        self.virtual_list = VirtualEventList(self.root, self, self._show_event_detail)
+        self._virtual_active = False
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
 
         # === フッター（Google Calendar リンク） ===
         self.footer = tk.Frame(self.root, bg=self.BG_COLOR)
         self.footer.pack(fill=tk.X, side=tk.BOTTOM)
-        tk.Frame(self.footer, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X)
+        footer_border = tk.Frame(self.footer, bg=self.BORDER_COLOR, height=1)
+        footer_border.pack(fill=tk.X)
+        # デバッグ表示（所要時間・API呼び出し数・キャッシュヒット率）。必要になるまでpackしない
+        self.debug_label = tk.Label(
+            self.footer, text="", bg=self.HEADER_BG, fg=self.TIME_COLOR,
+            font=("Consolas", 8), justify=tk.LEFT, anchor="w", padx=6, pady=4,
+        )
+        self._debug_anchor = footer_border
+        self.stale_label = tk.Label(
+            self.footer, text="", bg=self.BG_COLOR, fg=self.STALE_COLOR,
+            font=("Segoe UI", 8), pady=4,
+        )
+        self.stale_label.pack(side=tk.LEFT, padx=8)
         gcal_link = tk.Label(
             self.footer, text="Google Calendar \u2197", bg=self.BG_COLOR,
             fg=self.LINK_COLOR, font=("Segoe UI", 8, "underline"),
@@ -174,25 +259,73 @@ class CalendarWidget:
         self.context_menu = tk.Menu(self.root, tearoff=0)
         self.context_menu.add_command(label="更新", command=self._refresh_events)
         self.context_menu.add_command(label="今日に戻る", command=self._go_today)
+        self.context_menu.add_command(
+            label=f"次の空き時間（{self.FREE_SLOT_MINUTES}分）", command=self._show_next_free_slot,
+        )
         self.context_menu.add_command(label="最前面 ON/OFF", command=self._toggle_topmost)
+        self.context_menu.add_command(label="デバッグ表示 ON/OFF", command=self._toggle_debug_overlay)
         self.context_menu.add_command(label="ログアウト", command=self._do_logout)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="終了", command=self._quit)
         self.root.bind("<Button-3>", self._show_context_menu)
+        self.root.bind("<F12>", lambda e: self._toggle_debug_overlay())
 
         self._update_date_label()
 
+    # === 自動更新 ===
+
+    def _auto_refresh_interval(self):
+        """状況に応じた次の自動更新までの間隔（ミリ秒）を返す。"""
+        if self._refresh_errors:
+            # エラーが続くときは指数的に間隔を延ばす
+            return min(self.AUTO_REFRESH_MS * 2 ** (self._refresh_errors - 1), self.AUTO_REFRESH_MAX_MS)
+        if self.root.state() == "withdrawn":
+            return self.AUTO_REFRESH_IDLE_MS
+        now = self._get_now()
+        today = self.window_cache.get(self._get_today())
+        if today is None:
+            return self.AUTO_REFRESH_MS
+        upcoming = [e for e in today if not e.all_day and e.end > now]
+        if not upcoming:
+            return self.AUTO_REFRESH_IDLE_MS
+        next_start = min(e.start for e in upcoming)
+        if next_start - now <= datetime.timedelta(minutes=self.AUTO_REFRESH_SOON_MINUTES):
+            return self.AUTO_REFRESH_SOON_MS
+        return self.AUTO_REFRESH_MS
+
+    def _schedule_auto_refresh(self):
+        self._cancel_auto_refresh()
+        self._auto_refresh_timer = self.root.after(
+            self._auto_refresh_interval(), self._auto_refresh
+        )
+
+    def _cancel_auto_refresh(self):
+        if self._auto_refresh_timer is not None:
+            self.root.after_cancel(self._auto_refresh_timer)
+            self._auto_refresh_timer = None
+
+    def _reschedule_auto_refresh(self):
+        """取得が終わった時点の状況で次の自動更新を掛け直す（自動更新が有効な場合のみ）。"""
+        if self._auto_refresh_timer is not None:
+            self._schedule_auto_refresh()
+
+    def _auto_refresh(self):
+        self._auto_refresh_timer = None
+        if is_logged_in():
+            self._refresh_events()
+        self._schedule_auto_refresh()
+
     # === 日付ナビゲーション ===
 
     def _change_date(self, delta):
         self.display_date += datetime.timedelta(days=delta)
         self._update_date_label()
-        self._refresh_events()
+        self._refresh_events(force=False)
 
     def _go_today(self):
         self.display_date = datetime.date.today()
         self._update_date_label()
-        self._refresh_events()
+        self._refresh_events(force=False)
 
     def _update_date_label(self):
         weekdays = ["月", "火", "水", "木", "金", "土", "日"]
@@ -241,32 +374,23 @@ class CalendarWidget:
         self.alert_enabled = not self.alert_enabled
         if self.alert_enabled:
             self.alert_btn.configure(fg=self.ALERT_ON_COLOR)
-            self._alerted_events.clear()
         else:
             self.alert_btn.configure(fg=self.ALERT_OFF_COLOR)
+        self.alert_scheduler.set_enabled(self.alert_enabled)
 
-    def _check_alerts(self):
-        if self.alert_enabled and self.events:
-            now = self._get_now()
-            for event in self.events:
-                if event.get("all_day") or "error" in event:
-                    continue
-                try:
-                    start_dt = datetime.datetime.fromisoformat(event["start"])
-                    if start_dt.tzinfo is None:
-                        start_dt = start_dt.replace(tzinfo=self.cal_tz) if self.cal_tz else start_dt.astimezone()
-                    diff = (start_dt - now).total_seconds() / 60
-                    key = event["start"] + event["summary"]
-                    if 0 < diff <= self.ALERT_MINUTES_BEFORE and key not in self._alerted_events:
-                        self._alerted_events.add(key)
-                        self._show_alert(event, int(diff))
-                except (ValueError, KeyError):
-                    pass
-
-        self.root.after(self.ALERT_CHECK_MS, self._check_alerts)
+    def _update_alert_schedule(self):
+        """今日の予定で通知スケジュールとトレイアイコンを更新する（表示日が今日でなくても今日の予定を対象にする）。"""
+        today = self._get_today()
+        if self.display_date == today:
+            events = self.events
+        else:
+            events = self.window_cache.get(today) or []
+        self.alert_scheduler.set_events(events)
+        self.tray_updater.set_events(events)
 
     def _show_alert(self, event, minutes_left):
         try:
+            import winsound
             winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
         except Exception:
             pass
@@ -286,7 +410,7 @@ class CalendarWidget:
         ).pack(fill=tk.X, padx=10, pady=(8, 0))
 
         tk.Label(
-            alert_win, text=event["summary"], bg="#f38ba8", fg="#1e1e2e",
+            alert_win, text=event.summary, bg="#f38ba8", fg="#1e1e2e",
             font=("Segoe UI", 11, "bold"), anchor="w",
         ).pack(fill=tk.X, padx=10)
 
@@ -318,7 +442,11 @@ class CalendarWidget:
         self.root.geometry(f"+{x}+{y}")
 
     def _on_mousewheel(self, event):
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        units = int(-1 * (event.delta / 120))
+        if self._virtual_active:
+            self.virtual_list.scroll(units)
+        else:
+            self.canvas.yview_scroll(units, "units")
 
     def _show_context_menu(self, event):
         self.context_menu.tk_popup(event.x_root, event.y_root)
@@ -327,11 +455,61 @@ class CalendarWidget:
         self.topmost = not self.topmost
         self.root.attributes("-topmost", self.topmost)
 
+    # === デバッグ表示 ===
+
+    # 取得から描画までの処理順に並べる
+    DEBUG_SPANS = (
+        "refresh.total", "refresh.fetch", "auth.load", "auth.refresh", "api.build",
+        "api.request", "api.json", "api.parse", "bucket", "sync.full", "sync.incremental",
+        "disk.load", "disk.save", "ui.render", "ui.layout",
+    )
+
+    def _toggle_debug_overlay(self):
+        if self._debug_timer is not None:
+            self.root.after_cancel(self._debug_timer)
+            self._debug_timer = None
+            self.debug_label.pack_forget()
+        else:
+            self.debug_label.pack(fill=tk.X, after=self._debug_anchor)
+            self._update_debug_overlay()
+        self._update_window_height()
+
+    def _update_debug_overlay(self):
+        text = self._format_debug_overlay(stats.snapshot(), get_fetch_timings())
+        old_lines = self.debug_label.cget("text").count("\n")
+        self.debug_label.configure(text=text)
+        if text.count("\n") != old_lines:
+            self._update_window_height()
+        self._debug_timer = self.root.after(self.DEBUG_OVERLAY_MS, self._update_debug_overlay)
+
+    def _format_debug_overlay(self, snapshot, timings):
+        spans = snapshot["spans"]
+        names = [n for n in self.DEBUG_SPANS if n in spans]
+        names += sorted(n for n in spans if n not in self.DEBUG_SPANS)
+        lines = [f"{'span':<16}{'n':>5}{'last':>8}{'p95':>8} ms"]
+        for name in names:
+            s = spans[name]
+            lines.append(f"{name:<16}{s['count']:>5}{s['last']:>8.1f}{s['p95']:>8.1f}")
+        counters = snapshot["counters"]
+        lines.append(f"api calls {counters.get('api.calls', 0)}")
+        if timings["cold"] is not None:
+            # 初回の取得（接続・サービス構築を含む）と、接続を使い回した2回目以降の平均
+            line = f"fetch cold {timings['cold'] * 1000:.0f}"
+            if timings["warm_avg"] is not None:
+                line += f" / warm {timings['warm_avg'] * 1000:.0f} (n={timings['warm_count']})"
+            lines.append(line + " ms")
+        caches = [
+            f"{name} {c['rate'] * 100:.0f}% ({c['hits']}/{c['total']})"
+            for name, c in sorted(snapshot["caches"].items()) if c["total"]
+        ]
+        if caches:
+            lines.append("cache " + ", ".join(caches))
+        return "\n".join(lines)
+
     # === ログイン画面 ===
 
     def _show_login_screen(self):
-        for widget in self.events_frame.winfo_children():
-            widget.destroy()
+        self._clear_events_frame()
 
         tk.Label(
             self.events_frame, text="Googleにログインしてください",
@@ -357,8 +535,7 @@ class CalendarWidget:
         self._update_window_height()
 
     def _do_login(self):
-        for widget in self.events_frame.winfo_children():
-            widget.destroy()
+        self._clear_events_frame()
         tk.Label(
             self.events_frame, text="ブラウザで認証中...",
             bg=self.BG_COLOR, fg=self.TIME_COLOR,
@@ -369,15 +546,44 @@ class CalendarWidget:
         def run_login():
             try:
                 login()
-                self.root.after(0, self._refresh_events)
+                self.root.after(0, self._on_login)
             except Exception as e:
-                self.root.after(0, lambda: self._update_display([{"error": str(e)}]))
+                error = str(e)
+                self.root.after(0, lambda: self._show_error(error))
 
         threading.Thread(target=run_login, daemon=True).start()
 
+    def _on_login(self):
+        self._refresh_events()
+        self._schedule_auto_refresh()
+        self._load_profile_async()
+
+    def _load_profile_async(self, on_loaded=None):
+        """アカウント情報を裏で取得してキャッシュする。取得後にon_loaded(profile)をUIスレッドで呼ぶ。"""
+        def fetch():
+            profile = fetch_user_profile()
+            if on_loaded is not None:
+                self.root.after(0, lambda: on_loaded(profile))
+
+        threading.Thread(target=fetch, daemon=True).start()
+
     def _do_logout(self):
         """ログアウトしてログイン画面を表示する。"""
         logout()
+        self.refresher.cancel_all()
+        self._cancel_auto_refresh()
+        self.window_cache.clear()
+        self.sync_store.reset()
+        self.event_cache.clear()
+        self.events = []
+        self.event_index = IntervalIndex([])
+        self.display_clock.set_events([])
+        self.alert_scheduler.set_events([])
+        self.tray_updater.set_events([])
+        # 前のアカウントで取得した他の人の空き状況も残さない
+        self._free_busy.clear()
+        self._hide_free_busy()
+        self._set_stale_marker(None)
         self._show_login_screen()
 
     def _show_settings(self):
@@ -393,6 +599,7 @@ class CalendarWidget:
         tw.geometry(f"280x240+{x}+{y}")
 
         def close_settings():
+            self._set_free_busy_calendars(free_busy_var.get())
             tw.destroy()
 
         # ヘッダー（閉じるボタン）
@@ -419,16 +626,28 @@ class CalendarWidget:
             bg=self.BG_COLOR, fg=self.TIME_COLOR,
             font=("Segoe UI", 8), anchor="w",
         ).pack(fill=tk.X)
-        if is_logged_in():
-            email = get_user_email()
-            account_text = email if email else "Googleでログイン中"
-        else:
+        logged_in = is_logged_in()
+        profile = get_cached_profile() if logged_in else None
+        if not logged_in:
             account_text = "未ログイン"
-        tk.Label(
+        elif profile and profile.get("email"):
+            account_text = profile["email"]
+        else:
+            account_text = "Googleでログイン中"
+        account_label = tk.Label(
             frame, text=account_text,
             bg=self.BG_COLOR, fg=self.FG_COLOR,
             font=("Segoe UI", 9), anchor="w",
-        ).pack(fill=tk.X)
+        )
+        account_label.pack(fill=tk.X)
+
+        def show_profile(profile):
+            if profile and profile.get("email") and account_label.winfo_exists():
+                account_label.configure(text=profile["email"])
+
+        if logged_in and profile is None:
+            # キャッシュがなければ開いた後に取得して差し替える
+            self._load_profile_async(show_profile)
         tk.Frame(frame, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X, pady=(0, 12))
 
         logout_label = tk.Label(
@@ -437,7 +656,66 @@ class CalendarWidget:
         )
         logout_label.pack(fill=tk.X)
         logout_label.bind("<Button-1>", lambda e: (close_settings(), self._do_logout()))
-        tk.Frame(frame, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X, pady=(0, 16))
+        tk.Frame(frame, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X, pady=(0, 12))
+
+        tk.Label(
+            frame, text="表示するカレンダー",
+            bg=self.BG_COLOR, fg=self.TIME_COLOR,
+            font=("Segoe UI", 8), anchor="w",
+        ).pack(fill=tk.X)
+        calendars_frame = tk.Frame(frame, bg=self.BG_COLOR)
+        calendars_frame.pack(fill=tk.X)
+        loading = tk.Label(
+            calendars_frame, text="読み込み中...", bg=self.BG_COLOR, fg=self.TIME_COLOR,
+            font=("Segoe UI", 8), anchor="w",
+        )
+        loading.pack(fill=tk.X)
+        tk.Frame(frame, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X, pady=(4, 16))
+
+        def fit_height():
+            tw.update_idletasks()
+            tw.geometry(f"280x{tw.winfo_reqheight()}+{x}+{y}")
+
+        def show_calendars(calendars):
+            if not calendars_frame.winfo_exists():
+                return
+            loading.destroy()
+            for cal in calendars:
+                var = tk.BooleanVar(value=cal["id"] in self.selected_calendars)
+                tk.Checkbutton(
+                    calendars_frame, text=cal["summary"], variable=var,
+                    bg=self.BG_COLOR, fg=self.FG_COLOR, selectcolor=self.HEADER_BG,
+                    activebackground=self.BG_COLOR, activeforeground=self.FG_COLOR,
+                    font=("Segoe UI", 8), anchor="w", highlightthickness=0,
+                    command=lambda cid=cal["id"], v=var: self._toggle_calendar(cid, v.get()),
+                ).pack(fill=tk.X)
+            fit_height()
+
+        def fetch_calendars():
+            try:
+                calendars = list_calendars()
+            except Exception:
+                calendars = [{"id": cid, "summary": cid} for cid in self.selected_calendars]
+            self.root.after(0, lambda: show_calendars(calendars))
+
+        if is_logged_in():
+            threading.Thread(target=fetch_calendars, daemon=True).start()
+        else:
+            loading.configure(text="未ログイン")
+
+        tk.Label(
+            frame, text="空き状況を表示するカレンダー（カンマ区切り）",
+            bg=self.BG_COLOR, fg=self.TIME_COLOR,
+            font=("Segoe UI", 8), anchor="w",
+        ).pack(fill=tk.X)
+        free_busy_var = tk.StringVar(value=", ".join(self.free_busy_calendars))
+        free_busy_entry = tk.Entry(
+            frame, textvariable=free_busy_var, bg=self.HEADER_BG, fg=self.FG_COLOR,
+            insertbackground=self.FG_COLOR, relief=tk.FLAT, font=("Segoe UI", 8),
+        )
+        free_busy_entry.pack(fill=tk.X, pady=(2, 0))
+        free_busy_entry.bind("<Return>", lambda e: self._set_free_busy_calendars(free_busy_var.get()))
+        tk.Frame(frame, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X, pady=(4, 16))
 
         tk.Label(
             frame, text="サービス名  TodayGoogleCalender",
@@ -455,31 +733,190 @@ class CalendarWidget:
             font=("Segoe UI", 8), anchor="w",
         ).pack(fill=tk.X)
 
+    def _toggle_calendar(self, calendar_id, selected):
+        """表示するカレンダーを切り替えて再取得する。"""
+        calendars = [c for c in self.selected_calendars if c != calendar_id]
+        if selected:
+            calendars.append(calendar_id)
+        if not calendars:
+            calendars = ["primary"]
+        self.selected_calendars = calendars
+        set_selected_calendars(calendars)
+        self.refresher.cancel_all()
+        self.window_cache.clear()
+        self.sync_store.reset(calendar_id=calendars[0])
+        self._refresh_events()
+
     # === イベント取得・表示 ===
 
-    def _refresh_events(self):
+    def _refresh_events(self, force=True):
+        """表示日の予定を表示する。force=Falseならキャッシュを即表示し、不足分だけ取得する。"""
         target = self.display_date
+        self._refresh_free_busy(force)
+        if not force:
+            cached = self.window_cache.get(target)
+            stats.cache("window", cached is not None)
+            if cached is not None:
+                self._on_events_fetched(cached, self.window_cache.timezone)
+            else:
+                self._show_cached(target)
 
-        def fetch():
-            try:
-                result = get_events_for_date(target)
-                events = result["events"]
-                tz_name = result["timezone"]
-            except FileNotFoundError as e:
-                events = [{"error": str(e)}]
-                tz_name = None
-            except Exception as e:
-                events = [{"error": f"エラー: {e}"}]
-                tz_name = None
-            self.root.after(0, lambda: self._on_events_fetched(events, tz_name))
+        fetch_range = self.window_cache.missing_range(target, force=force)
+        if fetch_range is None:
+            return
 
-        threading.Thread(target=fetch, daemon=True).start()
+        calendar_ids = list(self.selected_calendars)
+        calendar_key = ",".join(calendar_ids)
+
+        def fetch(report_page):
+            with stats.span("refresh.fetch", days=(fetch_range[1] - fetch_range[0]).days):
+                use_sync = self.INCREMENTAL_SYNC and len(calendar_ids) == 1
+                if (
+                    use_sync
+                    and self.sync_store.is_ready()
+                    and self.sync_store.covers(*fetch_range)
+                ):
+                    # 同期期間内は差分同期してローカルストアから振り分ける
+                    changed = self.sync_store.sync()
+                    result = self.sync_store.events_for_range(*fetch_range)
+                    # 差分同期で変更が0件のときだけ「変更なし」（全件取得の0件は空のカレンダー）
+                    result["not_modified"] = self.sync_store.last_sync_incremental and changed == 0
+                else:
+                    result = get_events_for_range(
+                        *fetch_range,
+                        calendar_ids=calendar_ids,
+                        expand_recurring=self.LOCAL_RECURRENCE,
+                        on_page=report_page,
+                    )
+                    if use_sync and not self.sync_store.is_ready():
+                        # 表示中の期間を先に返し、同期期間全体の取得はこの結果の反映後に裏で行う
+                        self._start_background_sync()
+                if not result.get("failed"):
+                    with stats.span("disk.save"):
+                        self.event_cache.save_days(
+                            result["days"], result["timezone"], time.time(), calendar_key
+                        )
+                        # 古い日と、今は選んでいないカレンダーの組み合わせの行は捨てる
+                        self.event_cache.prune(
+                            datetime.date.today() - datetime.timedelta(days=self.DISK_CACHE_KEEP_DAYS),
+                            calendar_key,
+                        )
+                return result
+
+        submitted = time.perf_counter()
+
+        def on_result(result):
+            self._on_range_fetched(result)
+            # 依頼から画面への反映まで（待ち行列・取得・描画を含む）
+            stats.record("refresh.total", (time.perf_counter() - submitted) * 1000)
+
+        def on_error(e):
+            error = str(e) if isinstance(e, FileNotFoundError) else f"エラー: {e}"
+            self._on_fetch_error(target, error)
+
+        self.refresher.submit(
+            (fetch_range, calendar_key), fetch, on_result, on_error,
+            # 実行前に表示日が範囲外へ移っていれば取得しない
+            relevant=lambda: fetch_range[0] <= self.display_date < fetch_range[1],
+            # 途中のページもコーディネーター経由で渡し、ログアウトなどで取り消された取得の分は捨てる
+            on_progress=lambda partial: self._on_partial_range(target, partial),
+        )
+
+    def _start_background_sync(self):
+        """差分同期の準備（同期期間の全件取得）を取得用のワーカーで行う。表示は変えない。"""
+        self.refresher.submit(
+            ("sync", self.sync_store.calendar_id),
+            self.sync_store.sync, lambda changed: None, lambda e: stats.incr("sync.errors"),
+        )
 
-    def _on_events_fetched(self, events, tz_name):
+    def _on_range_fetched(self, result):
+        if result.get("failed"):
+            self._on_partial_fetch(result)
+            return
+        self._refresh_errors = 0
+        self.window_cache.put_days(result["days"], result["timezone"])
+        self.window_cache.evict(self.display_date)
+        self._reschedule_auto_refresh()
+        if (
+            result.get("not_modified")
+            and not self._showing_stale
+            and self._list_active
+            and self._shown_day == self.display_date
+        ):
+            # 変更なし（304）で、表示日の予定を表示済みなら再描画しない。
+            # 日付が変わっていることもあるので通知とトレイは今日の予定で掛け直す
+            self._update_alert_schedule()
+            return
+        if self.display_date in result["days"]:
+            self._on_events_fetched(result["days"][self.display_date], result["timezone"])
+        else:
+            self._update_alert_schedule()
+
+    def _on_partial_fetch(self, result):
+        """一部のカレンダーを取得できなかった結果は、キャッシュに入れずに印を付けて表示する。"""
+        self._refresh_errors += 1
+        self._reschedule_auto_refresh()
+        if self.display_date not in result["days"]:
+            self._update_alert_schedule()
+            return
+        self._on_events_fetched(result["days"][self.display_date], result["timezone"])
+        # 次の取得結果は変更なしでも描き直して印を消す
+        self._showing_stale = True
+        self.stale_label.configure(
+            text=f"\u26a0 {len(result['failed'])}件のカレンダーを取得できませんでした"
+        )
+
+    def _on_partial_range(self, target, partial):
+        """複数ページの取得中に、届いた分だけ先に表示する。キャッシュには入れない。"""
+        if target == self.display_date and target in partial["days"]:
+            self._on_events_fetched(partial["days"][target], partial["timezone"])
+
+    def _on_fetch_error(self, target, error):
+        self._refresh_errors += 1
+        self._reschedule_auto_refresh()
+        # キャッシュで表示できている日はエラーで上書きしない
+        if target != self.display_date or self.window_cache.get(target) is not None:
+            return
+        if not self._show_cached(target):
+            self.events = []
+            self.event_index = IntervalIndex([])
+            self._set_stale_marker(None)
+            self._show_error(error)
+
+    def _show_cached(self, day):
+        """ディスクキャッシュにある予定を古いデータとして表示する。表示できたらTrue。"""
+        with stats.span("disk.load"):
+            entry = self.event_cache.load_day(day, ",".join(self.selected_calendars))
+        stats.cache("disk", entry is not None)
+        if entry is None:
+            return False
+        events, tz_name, fetched_at = entry
+        self._on_events_fetched(events, tz_name, stale_since=fetched_at)
+        return True
+
+    def _on_events_fetched(self, events, tz_name, stale_since=None):
         if tz_name:
             self.cal_tz = ZoneInfo(tz_name)
         self.events = events
+        self._shown_day = self.display_date
+        self.event_index = IntervalIndex(events)
+        self._set_stale_marker(stale_since)
         self._update_display(events)
+        self.display_clock.set_events(events)
+        self._update_alert_schedule()
+
+    def _set_stale_marker(self, stale_since):
+        """キャッシュ表示中ならフッターに取得時刻を表示する。"""
+        self._showing_stale = stale_since is not None
+        if stale_since is None:
+            self.stale_label.configure(text="")
+            return
+        fetched = datetime.datetime.fromtimestamp(stale_since)
+        if fetched.date() == datetime.date.today():
+            when = fetched.strftime("%H:%M")
+        else:
+            when = f"{fetched.month}/{fetched.day} {fetched.strftime('%H:%M')}"
+        self.stale_label.configure(text=f"\u23f1 {when} 時点")
 
     def _get_now(self):
         """カレンダーのタイムゾーンでの現在時刻を返す。"""
@@ -491,155 +928,373 @@ class CalendarWidget:
         """カレンダーのタイムゾーンでの今日の日付を返す。"""
         return self._get_now().date()
 
-    def _update_display(self, events):
+    def _show_error(self, message):
+        self._clear_events_frame()
+
+        tk.Label(
+            self.events_frame, text=message, bg=self.BG_COLOR,
+            fg="#f38ba8", font=("Segoe UI", 9), wraplength=self.width - 20,
+            justify=tk.LEFT, padx=10, pady=20,
+        ).pack(fill=tk.X)
+        self._update_window_height()
+
+    def _clear_events_frame(self):
+        """予定表示エリアの中身をすべて破棄する（ログイン画面やエラー表示用）。"""
         for widget in self.events_frame.winfo_children():
             widget.destroy()
-
-        if events and "error" in events[0]:
-            tk.Label(
-                self.events_frame, text=events[0]["error"], bg=self.BG_COLOR,
-                fg="#f38ba8", font=("Segoe UI", 9), wraplength=self.width - 20,
-                justify=tk.LEFT, padx=10, pady=20,
-            ).pack(fill=tk.X)
-            self._update_window_height()
+        self.event_list.forget()
+        self._list_active = False
+        self._shown_day = None
+        self._set_virtual_mode(False)
+
+    def _set_virtual_mode(self, enabled):
+        """通常のカード表示と仮想化リストを切り替える。"""
+        if enabled == self._virtual_active:
             return
+        self._virtual_active = enabled
+        if enabled:
+            self.canvas.pack_forget()
+            self.virtual_list.canvas.pack(
+                side=tk.LEFT, fill=tk.BOTH, expand=True, before=self.footer
+            )
+        else:
+            self.virtual_list.canvas.pack_forget()
+            self.virtual_list.set_events([], set())
+            self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, before=self.footer)
+
+    def _update_display(self, events):
+        with stats.span("ui.render", events=len(events)):
+            self._render_events(events)
+
+    def _on_clock_tick(self):
+        """表示中の予定が始まった・終わった（または日付が変わった）ときに手元の予定で表示し直す。
+
+        取得はしない。カードは前回表示との差分だけが更新される。
+        """
+        self._update_date_label()
+        if self._list_active:
+            self._update_display(self.events)
+        cached = self._free_busy.get(self.display_date)
+        if self._free_busy_visible and cached is not None:
+            self._show_free_busy(self.display_date, cached[1])
+
+    def _render_events(self, events):
+        if not self._list_active:
+            # ログイン画面やエラー表示が残っていれば片付けてからカード表示に切り替える
+            self._clear_events_frame()
+            self._list_active = True
 
         now = self._get_now()
         is_today = self.display_date == self._get_today()
 
         # 今日表示の場合、終了済みの予定をフィルタ
-        visible_events = []
-        for event in events:
-            if is_today and not event.get("all_day", False):
-                try:
-                    end_dt = datetime.datetime.fromisoformat(event["end"])
-                    if end_dt.tzinfo is None:
-                        end_dt = end_dt.replace(tzinfo=self.cal_tz) if self.cal_tz else end_dt.astimezone()
-                    if end_dt < now:
-                        continue  # 過ぎた予定はスキップ
-                except (ValueError, KeyError):
-                    pass
-            visible_events.append(event)
-
-        if not visible_events:
+        if is_today:
+            visible_events = [e for e in events if e.all_day or e.end > now]
+        else:
+            visible_events = events
+
+        current_keys = {e.key for e in self.event_index.at(now)} if is_today else set()
+        conflict_keys = self.event_index.conflict_keys()
+
+        if len(visible_events) > self.VIRTUAL_LIST_THRESHOLD:
+            # 予定が多い日は見えている行だけをCanvasに描く
+            self.event_list.show_message(None)
+            self._set_virtual_mode(True)
+            self.virtual_list.set_events(visible_events, current_keys, conflict_keys)
+            changed = True
+        elif not visible_events:
+            self._set_virtual_mode(False)
             msg = "残りの予定はありません" if is_today and events else "予定はありません"
-            tk.Label(
-                self.events_frame, text=msg, bg=self.BG_COLOR,
-                fg=self.TIME_COLOR, font=("Segoe UI", 10), pady=20,
-            ).pack(fill=tk.X)
+            changed = self.event_list.show_message(msg)
+        else:
+            self._set_virtual_mode(False)
+            changed = self.event_list.render(visible_events, current_keys, conflict_keys)
+
+        # 表示が変わらなければレイアウトの再計算もしない
+        if changed:
             self._update_window_height()
+
+    # === 空き状況 ===
+
+    def _refresh_free_busy(self, force=True):
+        """表示日の空き状況を帯に表示する。対象のカレンダーがなければ帯を隠す。
+
+        予定一覧とは別に、freebusy().queryの1リクエストで全カレンダー分を取得する。
+        """
+        if not self.free_busy_calendars:
+            self._hide_free_busy()
             return
+        if not self._free_busy_visible:
+            self._free_busy_visible = True
+            self.free_busy_strip.frame.pack(fill=tk.X, after=self._nav_border)
+            self._update_window_height()
+
+        target = self.display_date
+        cached = self._free_busy.get(target)
+        if cached is not None:
+            self._show_free_busy(target, cached[1])
+            if not force and time.time() - cached[0] < self.FREE_BUSY_TTL:
+                return
+        else:
+            self.free_busy_strip.show(target, self._get_now().tzinfo, [], message="読み込み中...")
+
+        calendar_ids = list(self.free_busy_calendars)
+        end = target + datetime.timedelta(days=1)
+
+        def on_result(result):
+            self._free_busy[target] = (time.time(), result)
+            # 表示日から離れた日の結果は捨てる
+            for day in [d for d in self._free_busy if abs((d - self.display_date).days) > self.PREFETCH_DAYS]:
+                del self._free_busy[day]
+            if target == self.display_date:
+                self._show_free_busy(target, result)
+
+        def on_error(e):
+            if target == self.display_date and target not in self._free_busy:
+                self.free_busy_strip.show(
+                    target, self._get_now().tzinfo, [], message="空き状況を取得できませんでした",
+                )
+
+        self.refresher.submit(
+            ("freebusy", target, tuple(calendar_ids)),
+            lambda: query_free_busy(target, end, calendar_ids), on_result, on_error,
+            relevant=lambda: target == self.display_date,
+        )
 
-        for event in visible_events:
-            is_current = False
-            all_day = event.get("all_day", False)
-
-            if not all_day and is_today:
-                try:
-                    start_dt = datetime.datetime.fromisoformat(event["start"])
-                    end_dt = datetime.datetime.fromisoformat(event["end"])
-                    if start_dt.tzinfo is None:
-                        start_dt = start_dt.replace(tzinfo=self.cal_tz) if self.cal_tz else start_dt.astimezone()
-                    if end_dt.tzinfo is None:
-                        end_dt = end_dt.replace(tzinfo=self.cal_tz) if self.cal_tz else end_dt.astimezone()
-                    is_current = start_dt <= now <= end_dt
-                except (ValueError, KeyError):
-                    pass
-
-            bg = self.CURRENT_BG if is_current else self.BG_COLOR
-
-            card = tk.Frame(self.events_frame, bg=bg)
-            card.pack(fill=tk.X, padx=6, pady=2)
-
-            bar_color = self.CURRENT_FG if is_current else self.ACCENT_COLOR
-            tk.Frame(card, bg=bar_color, width=3).pack(
-                side=tk.LEFT, fill=tk.Y, padx=(0, 8), pady=4
+    def _hide_free_busy(self):
+        if self._free_busy_visible:
+            self._free_busy_visible = False
+            self.free_busy_strip.frame.pack_forget()
+            self._update_window_height()
+
+    def _show_free_busy(self, day, result):
+        message = None
+        if result["errors"] and not result["calendars"]:
+            message = "空き状況を参照できるカレンダーがありません"
+        self.free_busy_strip.show(
+            day, ZoneInfo(result["timezone"]), result["busy"], now=self._get_now(), message=message,
+        )
+
+    def _set_free_busy_calendars(self, text):
+        """設定画面で入力されたカンマ区切りのカレンダーIDを保存して空き状況を取り直す。"""
+        calendar_ids = [c.strip() for c in text.replace("\n", ",").split(",") if c.strip()]
+        if calendar_ids == self.free_busy_calendars:
+            return
+        self.free_busy_calendars = calendar_ids
+        set_free_busy_calendars(calendar_ids)
+        self._free_busy.clear()
+        self._refresh_free_busy()
+
+    # === 空き時間 ===
+
+    def _show_next_free_slot(self, loaded=False):
+        """今からFREE_SLOT_MINUTES分以上空いている最初の時間を表示する。
+
+        今日から続けてキャッシュにある日だけを探す。今日の予定がキャッシュにない
+        （表示日が今日から離れていて破棄された）ときは、今日の周辺を取得してから探す。
+        """
+        now = self._get_now()
+        today = now.date()
+        if self.window_cache.get(today) is None:
+            if loaded:
+                self._show_notice("今日の予定を読み込めなかったため空き時間を探せません")
+                return
+            self._show_notice("今日の予定を読み込んでいます...", duration_ms=2000)
+            self._load_window_for_free_slot(today)
+            return
+
+        # 今日から途切れずにキャッシュにある日の終わりまでを探す
+        day = today
+        window_end = self.window_cache.window(today)[1]
+        while day < window_end and self.window_cache.get(day) is not None:
+            day += datetime.timedelta(days=1)
+        until = datetime.datetime(day.year, day.month, day.day, tzinfo=now.tzinfo)
+        start = self.window_cache.index().next_free_slot(now, self.FREE_SLOT_MINUTES, until)
+        if start is None:
+            text = f"{day.month}/{day.day}までに{self.FREE_SLOT_MINUTES}分の空きはありません"
+        else:
+            start = start.astimezone(now.tzinfo)
+            when = start.strftime("%H:%M") if start.date() == now.date() else (
+                f"{start.month}/{start.day} {start.strftime('%H:%M')}"
             )
+            text = f"次の{self.FREE_SLOT_MINUTES}分の空き: {when}〜"
+        self._show_notice(text)
+
+    def _load_window_for_free_slot(self, today):
+        """今日の周辺の予定を取得してキャッシュに入れ、空き時間の検索をやり直す。"""
+        fetch_range = self.window_cache.window(today)
+        calendar_ids = list(self.selected_calendars)
+
+        def on_result(result):
+            if not result.get("failed"):
+                self.window_cache.put_days(result["days"], result["timezone"])
+            self._show_next_free_slot(loaded=True)
+
+        self.refresher.submit(
+            ("freeslot", fetch_range, ",".join(calendar_ids)),
+            lambda: get_events_for_range(
+                *fetch_range, calendar_ids=calendar_ids, expand_recurring=self.LOCAL_RECURRENCE,
+            ),
+            on_result, lambda e: self._show_next_free_slot(loaded=True),
+        )
 
-            content = tk.Frame(card, bg=bg)
-            content.pack(side=tk.LEFT, fill=tk.X, expand=True, pady=4)
+    def _show_notice(self, text, duration_ms=5000):
+        """ウィンドウの下に短いお知らせを一定時間表示する。"""
+        tw = tk.Toplevel(self.root)
+        tw.overrideredirect(True)
+        tw.attributes("-topmost", True)
+        x = self.root.winfo_x()
+        y = self.root.winfo_y() + self.root.winfo_height() + 4
+        tw.geometry(f"+{x}+{y}")
+        tk.Label(
+            tw, text=text, bg="#585b70", fg=self.FG_COLOR,
+            font=("Segoe UI", 9), padx=10, pady=6,
+        ).pack()
+        tw.bind("<Button-1>", lambda e: tw.destroy())
+        tw.after(duration_ms, tw.destroy)
 
-            if all_day:
-                time_str = "終日"
-                time_bg = self.ALLDAY_BG
-            else:
-                try:
-                    s = datetime.datetime.fromisoformat(event["start"])
-                    e = datetime.datetime.fromisoformat(event["end"])
-                    time_str = f"{s.strftime('%H:%M')} - {e.strftime('%H:%M')}"
-                except (ValueError, KeyError):
-                    time_str = ""
-                time_bg = bg
-
-            if time_str:
-                tk.Label(
-                    content, text=time_str,
-                    bg=time_bg if all_day else bg,
-                    fg=self.FG_COLOR if all_day else self.TIME_COLOR,
-                    font=("Segoe UI", 8), anchor="w",
-                    padx=2 if all_day else 0,
-                ).pack(anchor="w")
-
-            title_fg = self.CURRENT_FG if is_current else self.FG_COLOR
+    # === 予定の詳細 ===
+
+    def _show_event_detail(self, event):
+        """予定の詳細ウィンドウを開き、完全な情報を裏で取得して表示する。"""
+        tw = tk.Toplevel(self.root)
+        tw.overrideredirect(True)
+        tw.attributes("-topmost", True)
+        tw.configure(bg=self.BG_COLOR)
+        x = self.root.winfo_x() + self.width + 4
+        y = self.root.winfo_y()
+        tw.geometry(f"{self.width}x300+{x}+{y}")
+
+        header = tk.Frame(tw, bg=self.HEADER_BG)
+        header.pack(fill=tk.X)
+        close_label = tk.Label(
+            header, text=" \u2715 ", bg=self.HEADER_BG, fg=self.TIME_COLOR,
+            font=("Segoe UI", 10), cursor="hand2", pady=4,
+        )
+        close_label.pack(side=tk.RIGHT)
+        close_label.bind("<Button-1>", lambda e: tw.destroy())
+        tk.Label(
+            header, text=f" {event.summary}", bg=self.HEADER_BG, fg=self.ACCENT_COLOR,
+            font=("Segoe UI", 10, "bold"), anchor="w",
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Frame(tw, bg=self.BORDER_COLOR, height=1).pack(fill=tk.X)
+
+        conflicts = self.event_index.conflicts_with(event)
+        if conflicts:
+            lines = [
+                f"\u26a0 {e.start.strftime('%H:%M')}-{e.end.strftime('%H:%M')} {e.summary}"
+                for e in conflicts
+            ]
             tk.Label(
-                content, text=event["summary"], bg=bg, fg=title_fg,
-                font=("Segoe UI", 10, "bold") if is_current else ("Segoe UI", 10),
-                anchor="w", wraplength=self.width - 40, justify=tk.LEFT,
-            ).pack(anchor="w")
-
-            if event.get("location"):
-                tk.Label(
-                    content, text=f"\U0001f4cd {event['location']}", bg=bg,
-                    fg=self.LOCATION_COLOR, font=("Segoe UI", 8), anchor="w",
-                    wraplength=self.width - 40, justify=tk.LEFT,
-                ).pack(anchor="w")
-
-            tk.Frame(self.events_frame, bg=self.BORDER_COLOR, height=1).pack(
-                fill=tk.X, padx=10
-            )
+                tw, text="重なっている予定:\n" + "\n".join(lines), bg=self.BG_COLOR,
+                fg=self.CONFLICT_COLOR, font=("Segoe UI", 8), anchor="w", justify=tk.LEFT,
+                wraplength=self.width - 24, padx=12,
+            ).pack(fill=tk.X, pady=(6, 0))
+
+        body = tk.Label(
+            tw, text="読み込み中...", bg=self.BG_COLOR, fg=self.TIME_COLOR,
+            font=("Segoe UI", 9), anchor="nw", justify=tk.LEFT,
+            wraplength=self.width - 24, padx=12, pady=10,
+        )
+        body.pack(fill=tk.BOTH, expand=True)
 
-        self._update_window_height()
+        def fetch():
+            try:
+                detail = get_event_detail(event.id, event.calendar_id)
+                text = self._format_event_detail(detail)
+            except Exception as e:
+                text = f"エラー: {e}"
+            self.root.after(0, lambda: body.winfo_exists() and body.configure(text=text, fg=self.FG_COLOR))
+
+        threading.Thread(target=fetch, daemon=True).start()
+
+    def _format_event_detail(self, detail):
+        lines = []
+        if detail.get("location"):
+            lines.append(f"\U0001f4cd {detail['location']}")
+        conference = detail.get("hangoutLink") or next(
+            (ep.get("uri") for ep in detail.get("conferenceData", {}).get("entryPoints", [])
+             if ep.get("entryPointType") == "video"),
+            None,
+        )
+        if conference:
+            lines.append(f"\U0001f517 {conference}")
+        organizer = detail.get("organizer", {})
+        if organizer.get("email"):
+            lines.append(f"主催: {organizer.get('displayName') or organizer['email']}")
+        attendees = detail.get("attendees", [])
+        if attendees:
+            names = [a.get("displayName") or a.get("email", "") for a in attendees[:10]]
+            more = f" ほか{len(attendees) - 10}名" if len(attendees) > 10 else ""
+            lines.append(f"参加者({len(attendees)}): " + ", ".join(names) + more)
+        if detail.get("description"):
+            lines.append("")
+            lines.append(detail["description"])
+        return "\n".join(lines) if lines else "詳細はありません"
 
     def _update_window_height(self):
+        with stats.span("ui.layout"):
+            self._layout_window()
+
+    def _layout_window(self):
         self.root.update_idletasks()
         header_h = self.header.winfo_reqheight()
         nav_h = self.nav_bar.winfo_reqheight()
+        if self._free_busy_visible:
+            nav_h += self.free_busy_strip.frame.winfo_reqheight()
         footer_h = self.footer.winfo_reqheight()
-        content_h = self.events_frame.winfo_reqheight()
+        if self._virtual_active:
+            content_h = self.virtual_list.content_height()
+        else:
+            content_h = self.events_frame.winfo_reqheight()
         fixed_h = header_h + nav_h + footer_h + 2  # borders
         max_content = 400
         canvas_h = min(content_h, max_content)
         total_h = fixed_h + canvas_h
-        self.canvas.configure(height=canvas_h)
+        if self._virtual_active:
+            self.virtual_list.canvas.configure(height=canvas_h)
+        else:
+            self.canvas.configure(height=canvas_h)
         x = self.root.winfo_x()
         y = self.root.winfo_y()
         self.root.geometry(f"{self.width}x{total_h}+{x}+{y}")
 
     # === システムトレイ ===
 
-    def _create_tray_image(self):
-        img = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-        draw.rectangle([8, 16, 56, 56], fill="#89b4fa", outline="#313244", width=2)
-        draw.rectangle([8, 16, 56, 28], fill="#f38ba8")
-        draw.text((22, 30), str(datetime.date.today().day), fill="#1e1e2e")
-        return img
-
     def _setup_tray_icon(self):
-        image = self._create_tray_image()
+        # pystrayとPILの読み込み・アイコン生成はUIスレッドを止めないよう別スレッドで行う
+        threading.Thread(target=self._run_tray_icon, daemon=True).start()
+
+    def _run_tray_icon(self):
+        import pystray
+        from tray_icon import TrayIconRenderer
+
+        renderer = TrayIconRenderer(self)
+        image = renderer.render(datetime.date.today().day, None, False)
         menu = pystray.Menu(
             pystray.MenuItem("表示", self._show_from_tray, default=True),
             pystray.MenuItem("更新", lambda: self.root.after(0, self._refresh_events)),
             pystray.MenuItem("終了", self._quit_from_tray),
         )
         self.tray_icon = pystray.Icon("calendar_widget", image, "今日の予定", menu)
-        threading.Thread(target=self.tray_icon.run, daemon=True).start()
+        # 以降の描き直しは表示内容が変わるときだけ、Tkのスレッドから行う
+        icon = self.tray_icon
+        self.root.after(0, lambda: self.tray_updater.attach(icon, renderer))
+        self.tray_icon.run()
 
     def _hide_to_tray(self):
         self.root.withdraw()
+        self._reschedule_auto_refresh()
 
     def _show_from_tray(self):
-        self.root.after(0, self.root.deiconify)
+        self.root.after(0, self._restore_from_tray)
+
+    def _restore_from_tray(self):
+        self.root.deiconify()
+        # 格納中は更新間隔を延ばしていたので、表示したらすぐ最新にする
+        if is_logged_in():
+            self._refresh_events(force=False)
+        self._reschedule_auto_refresh()
 
     def _quit_from_tray(self):
         if self.tray_icon: